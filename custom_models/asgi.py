@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'custom_models.settings')
+# Read by the settings, which keep no persistent connections under ASGI.
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'myapp.profiling.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,17 +77,145 @@ WSGI_APPLICATION = 'custom_models.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection handling is set from the environment:
+#   DB_CONN_MAX_AGE       seconds to keep a connection open between requests
+#                         (0 closes it after every request, default 60);
+#                         always 0 under ASGI, see below
+#   DB_CONN_HEALTH_CHECKS check a reused connection before each request
+#   DB_POOL               use a psycopg 3 connection pool instead; needs
+#                         psycopg[pool] and forces CONN_MAX_AGE to 0
+#   DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT (seconds to wait for
+#   a free connection), DB_POOL_MAX_IDLE (seconds before an idle connection
+#   above the minimum is closed)
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'models', 
-        'USER': 'jibran', 
-        'PASSWORD': 'jibran',
-        'HOST': 'localhost', 
-        'PORT': '5432' 
+        'NAME': os.environ.get('DB_NAME', 'models'),
+        'USER': os.environ.get('DB_USER', 'jibran'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'jibran'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+if env_bool('DJANGO_ASGI', False):
+    # Set by custom_models.asgi. Under ASGI each request runs its queries in
+    # a thread of its own, so a persistent connection is never reused; it
+    # stays open until it expires and they pile up past the server's limit.
+    # Use DB_POOL to reuse connections.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+if env_bool('DB_POOL', False):
+    # Pooled connections are returned to the pool after each request, so
+    # Django must not keep them open itself.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+    }
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The 'rosters' cache holds course rosters and enrollment counts (see
+# myapp.rosters). Set REDIS_URL to share it between processes; configure
+# Redis with a maxmemory-policy of allkeys-lru for LRU eviction.
+# The 'auth' cache holds sessions and users (see myapp.auth); AUTH_REDIS_URL
+# must name a different Redis database, since `warm_rosters --clear` flushes
+# the rosters one.
+# The 'template_fragments' cache holds rendered admin change list rows and
+# the model version stamps they are keyed by (see myapp.fragments). It
+# shares the rosters Redis database; flushing it only costs re-rendering.
+
+ROSTER_CACHE_TIMEOUT = int(os.environ.get('ROSTER_CACHE_TIMEOUT', 300))
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 300))
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 600))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'rosters': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rosters',
+        'TIMEOUT': ROSTER_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template_fragments',
+        'TIMEOUT': FRAGMENT_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['rosters'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'TIMEOUT': ROSTER_CACHE_TIMEOUT,
+    }
+    CACHES['template_fragments'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'TIMEOUT': FRAGMENT_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'fragments',
+    }
+
+if os.environ.get('AUTH_REDIS_URL'):
+    CACHES['auth'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['AUTH_REDIS_URL'],
+    }
+
+
+# Sessions and authentication
+# Sessions are read from the 'auth' cache and written through to the
+# database; users are cached by myapp.auth.CachedModelBackend.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'auth'
+
+AUTHENTICATION_BACKENDS = ['myapp.auth.CachedModelBackend']
+
+
+# Profiling
+# Fraction of requests (and, when non-zero, every populate/clear_data run)
+# whose queries are recorded for /admin/perf/. 0 removes the middleware.
+# PROFILING_LOG, if set, is a file every record is appended to as JSON.
+
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_BUFFER_SIZE = 500
+PROFILING_LOG = os.environ.get('PROFILING_LOG')
+
+
+# Change feed
+# Inserts, updates and deletes of students, courses and enrollments are
+# logged for /api/changes/ and `changes_since` (see myapp.changes). Run
+# `compact_changes` periodically; it drops logged deletes after
+# CHANGE_LOG_RETENTION_DAYS. CHANGE_LOG_TRIGGERS switches from signals to the
+# PostgreSQL triggers installed by `compact_changes --install-triggers`.
+
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 7))
+CHANGE_LOG_TRIGGERS = env_bool('CHANGE_LOG_TRIGGERS', False)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -106,6 +236,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER picks the hasher for new and changed passwords: 'pbkdf2'
+# (Django's default), 'scrypt' or 'argon2' (needs argon2-cffi). The others
+# stay listed so existing hashes still verify; they are upgraded to the
+# preferred hasher when their user next logs in.
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+hashers = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'myapp.hashers.TunedScryptPasswordHasher',
+    'argon2': 'myapp.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [hashers[PASSWORD_HASHER]] + [
+    path for name, path in hashers.items() if name != PASSWORD_HASHER
+]
+
+PASSWORD_ARGON2 = {
+    'time_cost': int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2)),
+    'memory_cost': int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400)),
+    'parallelism': int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8)),
+}
+PASSWORD_SCRYPT = {
+    'work_factor': int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2**14)),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -0,0 +1,41 @@
+"""
+Production settings for custom_models.
+
+Use with DJANGO_SETTINGS_MODULE=custom_models.settings_production. Everything
+not overridden here comes from custom_models.settings and its environment
+variables.
+
+Database connections are kept open for DB_CONN_MAX_AGE seconds under WSGI
+only. Served through custom_models.asgi every request opens a new one, so
+set DB_POOL=1 there (or put PgBouncer in front of PostgreSQL).
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+
+# Templates
+# Compiled once per process and never checked for changes on disk, so a
+# deploy needs a restart. Listing the loaders requires APP_DIRS to be off.
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    (
+        'django.template.loaders.cached.Loader',
+        [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ],
+    ),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor
+    for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.template.context_processors.debug'
+]
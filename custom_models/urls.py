@@ -15,8 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+from myapp.views import perf_report
 
 urlpatterns = [
+    path('admin/perf/', perf_report, name='perf_report'),
     path('admin/', admin.site.urls),
+    path('api/', include('myapp.urls')),
 ]
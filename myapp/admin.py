@@ -1,7 +1,19 @@
+import binascii
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, reverse
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import quote
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction
+from django.db.models.functions import Upper
+from django.urls import get_script_prefix, get_urlconf, path, reverse
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.timezone import get_current_timezone_name
+from django.utils.translation import get_language
 from .models import (
+    Change,
     Department,
     Teacher,
     Student,
@@ -10,12 +22,353 @@ from .models import (
     Classroom,
     LargeClassroom,
     CustomUser,
+    CourseMonthlyEnrollment,
+    DepartmentReport,
+    ReportRefresh,
+    TeacherLoadReport,
 )
 from django.contrib.auth.admin import UserAdmin
 from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from . import changes, counters, fragments, jobs, rosters
+from .pagination import (
+    AFTER_VAR,
+    BEFORE_VAR,
+    EstimatedCountPaginator,
+    decode_cursor,
+    encode_cursor,
+    keyset_columns,
+    seek,
+)
+
+# Stands in for the object id in the URLs RowButtonsMixin builds.
+PK_PLACEHOLDER = "__pk__"
+
+
+class OptimizedChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        fields = self.model_admin.get_list_only_fields(request)
+        return queryset.only(*fields) if fields else queryset
+
+
+class KeysetChangeList(OptimizedChangeList):
+    """Change list that pages by seeking past the last row shown.
+
+    Every page costs the same index range scan however deep it is, instead of
+    an OFFSET that reads and discards all earlier rows. Falls back to regular
+    numbered pages when the current ordering cannot be seeked on.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        # The parent only slices the queryset lazily, so this costs the count.
+        super().get_results(request)
+        self.keyset = False
+        self.count_estimated = getattr(self.paginator, "estimated", False)
+        columns = keyset_columns(self.model, self.queryset.query.order_by)
+        if (
+            columns is None
+            or not self.multi_page
+            or (self.show_all and self.can_show_all)
+            or self.model_admin.list_editable
+        ):
+            return
+
+        after = request.GET.get(AFTER_VAR)
+        before = request.GET.get(BEFORE_VAR)
+        queryset = self.queryset
+        try:
+            if after:
+                queryset = seek(
+                    queryset, columns, self.cursor_values(columns, after), True
+                )
+            elif before:
+                queryset = seek(
+                    queryset, columns, self.cursor_values(columns, before), False
+                ).reverse()
+        except (ValueError, TypeError, ValidationError, binascii.Error):
+            raise IncorrectLookupParameters
+
+        rows = list(queryset[: self.list_per_page + 1])
+        more = len(rows) > self.list_per_page
+        rows = rows[: self.list_per_page]
+        if before:
+            rows.reverse()
+        has_previous = more if before else bool(after)
+        has_next = True if before else more
+
+        self.keyset = True
+        self.result_list = rows
+        self.first_url = self.get_query_string(
+            remove=[AFTER_VAR, BEFORE_VAR, PAGE_VAR]
+        )
+        self.previous_url = self.next_url = None
+        if rows and has_previous:
+            self.previous_url = self.get_query_string(
+                {BEFORE_VAR: self.cursor(columns, rows[0])}, [AFTER_VAR, PAGE_VAR]
+            )
+        if rows and has_next:
+            self.next_url = self.get_query_string(
+                {AFTER_VAR: self.cursor(columns, rows[-1])}, [BEFORE_VAR, PAGE_VAR]
+            )
+
+    def cursor(self, columns, row):
+        return encode_cursor([getattr(row, attname) for attname, _, _ in columns])
+
+    def cursor_values(self, columns, token):
+        values = decode_cursor(token)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Malformed cursor.")
+        return [
+            field.to_python(value) for (_, field, _), value in zip(columns, values)
+        ]
+
+
+class OptimizedModelAdmin(admin.ModelAdmin):
+    """ModelAdmin whose change list avoids per-row queries.
+
+    Foreign keys shown in ``list_display`` are loaded with ``select_related``
+    (Django only does that for non-null foreign keys on its own), and the
+    change list only fetches the columns it displays. Admin methods in
+    ``list_display`` are expected to read nothing but the primary key; set
+    ``list_only_fields`` if they need more, or to ``False`` to load every
+    column.
+    """
+
+    list_only_fields = None
+
+    def _list_field(self, name):
+        if not isinstance(name, str):
+            return None
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def get_list_select_related(self, request):
+        if self.list_select_related:
+            return self.list_select_related
+        return [
+            name
+            for name in self.get_list_display(request)
+            if getattr(self._list_field(name), "many_to_one", False)
+        ]
+
+    def get_list_only_fields(self, request):
+        if self.list_only_fields is not None:
+            return self.list_only_fields
+        fields = {self.model._meta.pk.name}
+        for name in self.get_list_display(request):
+            field = self._list_field(name)
+            if field is not None:
+                fields.add(name)
+            elif name == "action_checkbox" or (
+                isinstance(name, str) and hasattr(self, name)
+            ):
+                continue
+            else:
+                # __str__, model methods and callables may read any column.
+                return None
+        for name in self.get_ordering(request) or self.model._meta.ordering:
+            name = name.lstrip("-")
+            if self._list_field(name) is not None:
+                fields.add(name)
+        return sorted(fields)
+
+    def get_changelist(self, request, **kwargs):
+        return OptimizedChangeList
+
+
+class KeysetPaginationMixin:
+    """Keyset pagination and estimated counts for very large change lists."""
+
+    change_list_template = "admin/keyset_change_list.html"
+    paginator = EstimatedCountPaginator
+    # The unfiltered total would be an exact COUNT(*) on every search.
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class BulkActionMixin:
+    """Run admin actions as set-based UPDATEs instead of per-object saves.
+
+    When "select all" is used the selection is updated in primary key chunks
+    so a single statement never locks the whole table.
+    """
+
+    bulk_chunk_size = 5000
+    uppercase_fields = ()
+    uppercase_message = "Names updated to uppercase."
+
+    def bulk_update(self, request, queryset, **updates):
+        if request.POST.get("select_across") != "1":
+            pks = list(queryset.values_list("pk", flat=True))
+            with transaction.atomic():
+                changes.log(self.model, pks, Change.UPDATE)
+                count = queryset.update(**updates)
+            self.bulk_updated(pks)
+        else:
+            count = 0
+            pks = queryset.order_by("pk").values_list("pk", flat=True)
+            last_pk = None
+            while True:
+                chunk = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+                chunk = list(chunk[: self.bulk_chunk_size])
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    changes.log(self.model, chunk, Change.UPDATE)
+                    count += self.model._default_manager.filter(
+                        pk__in=chunk
+                    ).update(**updates)
+                self.bulk_updated(chunk)
+                last_pk = chunk[-1]
+        fragments.bump([self.model])
+        self.after_bulk_update(request, queryset, updates, count)
+        return count
+
+    def bulk_updated(self, pks):
+        """Called with the primary keys of each updated chunk once committed.
+
+        queryset.update() sends no signals; drop caches of the rows here.
+        """
+
+    def after_bulk_update(self, request, queryset, updates, count):
+        """Hook for audit logging; called once per bulk action."""
+
+    def make_uppercase(self, request, queryset):
+        self.bulk_update(
+            request,
+            queryset,
+            **{field: Upper(field) for field in self.uppercase_fields},
+        )
+        self.message_user(request, self.uppercase_message)
+
+    make_uppercase.short_description = "Make selected %(verbose_name_plural)s uppercase"
+
+
+class ReadOnlyAdminMixin:
+    """Browse-only admin for tables rebuilt by refresh_reports."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class RowButtonsMixin:
+    """Edit and delete buttons for ``list_display``.
+
+    Each button's HTML is built once per script prefix and URLconf around a
+    placeholder id, and rows only fill their id in, instead of calling
+    ``reverse()`` and ``format_html()`` for every cell.
+    """
+
+    # Defaults to the model's verbose name, e.g. "Edit Department".
+    button_label = None
+
+    def _button_parts(self, url_name, template):
+        key = (url_name, get_script_prefix(), get_urlconf())
+        parts = self.__dict__.setdefault("_button_cache", {})
+        if key not in parts:
+            opts = self.model._meta
+            route = f"{opts.app_label}_{opts.model_name}_{url_name}"
+            url = reverse(f"{self.admin_site.name}:{route}", args=[PK_PLACEHOLDER])
+            label = self.button_label or opts.verbose_name.title()
+            html = format_html(template, url=url, label=label)
+            parts[key] = html.split(PK_PLACEHOLDER)
+        return parts[key]
+
+    def _button(self, obj, url_name, template):
+        head, tail = self._button_parts(url_name, template)
+        # quote() escapes every character that would need escaping in HTML.
+        return mark_safe(f"{head}{quote(obj.pk)}{tail}")
+
+    def edit_button(self, obj):
+        return self._button(
+            obj, "change", '<a class="button" href="{url}">Edit {label}</a>'
+        )
 
+    edit_button.short_description = "Edit"
 
-class CustomUserAdmin(UserAdmin):
+    def delete_button(self, obj):
+        return self._button(
+            obj,
+            "delete",
+            '<a class="button" href="{url}" style="color:red;">Delete {label}</a>',
+        )
+
+    delete_button.short_description = "Delete"
+
+
+class FragmentCacheMixin:
+    """Render the change list rows from the fragment cache while unchanged.
+
+    The rows are cached under the version stamps of the model, of the
+    foreign keys in ``list_display`` and of the rows its counters count, so
+    saving or deleting any of them (see myapp.fragments) renders them anew.
+    The count and row queries still run; the rendering is what's saved.
+    Mixins with their own change list template (which must extend
+    admin/cached_change_list.html) go before this one in the bases.
+    """
+
+    change_list_template = "admin/cached_change_list.html"
+
+    def fragment_models(self, request):
+        models = {self.model}
+        for name in self.get_list_display(request):
+            if not isinstance(name, str):
+                continue
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one:
+                models.add(field.related_model)
+        models.update(
+            counter.child
+            for counter in counters.COUNTERS
+            if counter.model is self.model._meta.concrete_model
+        )
+        return models
+
+    def result_list_key(self, request):
+        """The fragment cache key of this request's rows, or None to skip it."""
+        if request.method != "GET" or self.list_editable:
+            return None
+        parts = [
+            request.GET.urlencode(),
+            request.user.pk,
+            get_language(),
+            get_current_timezone_name(),
+            get_script_prefix(),
+            *map(str, self.get_list_display(request)),
+            *fragments.versions(self.fragment_models(request)),
+        ]
+        return "|".join(map(str, parts))
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "result_list_key": self.result_list_key(request),
+            "result_list_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+        }
+        return super().changelist_view(request, extra_context)
+
+
+class CustomUserAdmin(RowButtonsMixin, FragmentCacheMixin, UserAdmin):
     model = CustomUser
     list_display = (
         "phone_number",
@@ -28,38 +381,56 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ("phone_number", "first_name", "last_name")
     ordering = ("phone_number",)
 
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_customuser_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete User</a>', url
-        )
-
-    delete_button.short_description = "Delete"
-
 
-class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ("name", "head", "edit_button", "delete_button")
+class DepartmentAdmin(
+    RowButtonsMixin, FragmentCacheMixin, BulkActionMixin, OptimizedModelAdmin
+):
+    list_display = (
+        "name",
+        "head",
+        "teacher_count",
+        "classroom_count",
+        "edit_button",
+        "delete_button",
+    )
     search_fields = ("name",)
     actions = ["make_uppercase"]
+    uppercase_fields = ("name",)
+    uppercase_message = "Department names updated to uppercase."
 
     change_list_template = "admin/department_change_list.html"
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_department_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Department</a>', url)
-
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_department_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Department</a>', url
-        )
-
     def delete_all(self, request):
-        if request.method == "POST":
+        if request.method != "POST":
+            context = {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": "Delete all departments",
+                "department_count": Department.objects.count(),
+            }
+            return TemplateResponse(
+                request, "admin/department_delete_all.html", context
+            )
+
+        if request.POST.get("mode") == "sync":
             Department.objects.all().delete()
             self.message_user(request, "All departments deleted.")
+        else:
+            jobs.enqueue(jobs.DELETE_DEPARTMENTS)
+            self.message_user(
+                request,
+                "Deleting all departments in the background. "
+                "Progress is shown above the list.",
+            )
         return HttpResponseRedirect("../")
 
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "delete_job": jobs.active_job(jobs.DELETE_DEPARTMENTS),
+        }
+        return super().changelist_view(request, extra_context)
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -68,7 +439,9 @@ class DepartmentAdmin(admin.ModelAdmin):
         return custom_urls + urls
 
 
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(
+    RowButtonsMixin, FragmentCacheMixin, BulkActionMixin, OptimizedModelAdmin
+):
     list_display = (
         "first_name",
         "last_name",
@@ -79,28 +452,17 @@ class TeacherAdmin(admin.ModelAdmin):
     )
     search_fields = ("first_name", "last_name", "email")
     actions = ["make_uppercase"]
+    uppercase_fields = ("first_name", "last_name")
+    uppercase_message = "Teacher names updated to uppercase."
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_teacher_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Teacher</a>', url)
-
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_teacher_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Teacher</a>', url
-        )
-
-    def make_uppercase(self, request, queryset):
-        for teacher in queryset:
-            teacher.first_name = teacher.first_name.upper()
-            teacher.last_name = teacher.last_name.upper()
-            teacher.save()
-        self.message_user(request, "Teacher names updated to uppercase.")
-
-    make_uppercase.short_description = "Make selected teachers' names uppercase"
 
-
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(
+    RowButtonsMixin,
+    KeysetPaginationMixin,
+    FragmentCacheMixin,
+    BulkActionMixin,
+    OptimizedModelAdmin,
+):
     list_display = (
         "first_name",
         "last_name",
@@ -111,52 +473,33 @@ class StudentAdmin(admin.ModelAdmin):
     )
     search_fields = ("first_name", "last_name", "email")
     actions = ["make_uppercase"]
+    uppercase_fields = ("first_name", "last_name")
+    uppercase_message = "Student names updated to uppercase."
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_student_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Student</a>', url)
-
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_student_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Student</a>', url
-        )
-
-    def make_uppercase(self, request, queryset):
-        for student in queryset:
-            student.first_name = student.first_name.upper()
-            student.last_name = student.last_name.upper()
-            student.save()
-        self.message_user(request, "Student names updated to uppercase.")
-
-    make_uppercase.short_description = "Make selected students' names uppercase"
+    def bulk_updated(self, pks):
+        rosters.invalidate_students(pks)
 
 
-class CourseAdmin(admin.ModelAdmin):
-    list_display = ("name", "code", "teacher", "edit_button", "delete_button")
+class CourseAdmin(
+    RowButtonsMixin, FragmentCacheMixin, BulkActionMixin, OptimizedModelAdmin
+):
+    list_display = (
+        "name",
+        "code",
+        "teacher",
+        "enrollment_count",
+        "edit_button",
+        "delete_button",
+    )
     search_fields = ("name", "code")
     actions = ["make_uppercase"]
+    uppercase_fields = ("name",)
+    uppercase_message = "Course names updated to uppercase."
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_course_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Course</a>', url)
-
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_course_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Course</a>', url
-        )
-
-    def make_uppercase(self, request, queryset):
-        for course in queryset:
-            course.name = course.name.upper()
-            course.save()
-        self.message_user(request, "Course names updated to uppercase.")
-
-    make_uppercase.short_description = "Make selected courses uppercase"
 
-
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(
+    RowButtonsMixin, KeysetPaginationMixin, FragmentCacheMixin, OptimizedModelAdmin
+):
     list_display = (
         "student",
         "course",
@@ -166,18 +509,8 @@ class EnrollmentAdmin(admin.ModelAdmin):
     )
     search_fields = ("student__first_name", "course__name")
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_enrollment_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Enrollment</a>', url)
 
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_enrollment_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Enrollment</a>', url
-        )
-
-
-class ClassroomAdmin(admin.ModelAdmin):
+class ClassroomAdmin(RowButtonsMixin, FragmentCacheMixin, OptimizedModelAdmin):
     list_display = (
         "room_number",
         "capacity",
@@ -187,23 +520,45 @@ class ClassroomAdmin(admin.ModelAdmin):
     )
     search_fields = ("room_number",)
 
-    def edit_button(self, obj):
-        url = reverse("admin:myapp_classroom_change", args=[obj.id])
-        return format_html('<a class="button" href="{}">Edit Classroom</a>', url)
 
-    def delete_button(self, obj):
-        url = reverse("admin:myapp_classroom_delete", args=[obj.id])
-        return format_html(
-            '<a class="button" href="{}" style="color:red;">Delete Classroom</a>', url
-        )
-
-class LargeClassroomAdmin(admin.ModelAdmin):
+class LargeClassroomAdmin(OptimizedModelAdmin):
+    # LargeClassroom.objects only returns large classrooms.
     list_display = ('room_number', 'capacity', 'department')
-    
-    def get_queryset(self, request):
-        # Filter classrooms where capacity is greater than 50
-        queryset = super().get_queryset(request)
-        return queryset.filter(capacity__gt=50)
+
+
+class DepartmentReportAdmin(ReadOnlyAdminMixin, OptimizedModelAdmin):
+    list_display = (
+        "name",
+        "teacher_count",
+        "course_count",
+        "student_count",
+        "enrollment_count",
+        "classroom_count",
+        "capacity",
+        "utilization",
+    )
+    search_fields = ("name",)
+
+
+class TeacherLoadReportAdmin(ReadOnlyAdminMixin, OptimizedModelAdmin):
+    list_display = (
+        "first_name",
+        "last_name",
+        "department_name",
+        "course_count",
+        "enrollment_count",
+    )
+    search_fields = ("first_name", "last_name", "department_name")
+
+
+class CourseMonthlyEnrollmentAdmin(ReadOnlyAdminMixin, OptimizedModelAdmin):
+    list_display = ("month", "course", "enrollment_count")
+    date_hierarchy = "month"
+    search_fields = ("course__name", "course__code")
+
+
+class ReportRefreshAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "watermark", "refreshed_at", "duration")
 
 
 # Register the models with the custom admin classes
@@ -215,3 +570,7 @@ admin.site.register(Course, CourseAdmin)
 admin.site.register(Enrollment, EnrollmentAdmin)
 admin.site.register(Classroom, ClassroomAdmin)
 admin.site.register(LargeClassroom, LargeClassroomAdmin)
+admin.site.register(DepartmentReport, DepartmentReportAdmin)
+admin.site.register(TeacherLoadReport, TeacherLoadReportAdmin)
+admin.site.register(CourseMonthlyEnrollment, CourseMonthlyEnrollmentAdmin)
+admin.site.register(ReportRefresh, ReportRefreshAdmin)
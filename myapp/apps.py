@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from . import changes, counters, fragments, signals  # noqa: F401
+
+        counters.connect()
+        changes.connect()
+        fragments.connect()
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+CACHE_ALIAS = "auth"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def phone_key(phone_number):
+    return f"user-phone:{phone_number}"
+
+
+def timeout():
+    return getattr(settings, "USER_CACHE_TIMEOUT", 300)
+
+
+def invalidate_user(user):
+    """Drop ``user`` from the cache; called whenever a user is saved or deleted."""
+    get_cache().delete_many([user_key(user.pk), phone_key(user.phone_number)])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that caches users by id and by phone number.
+
+    Saving or deleting a user (which covers password changes, deactivation
+    and last_login updates) invalidates its entries; queryset.update()
+    does not, so entries also expire after USER_CACHE_TIMEOUT seconds.
+    Permissions are still loaded per request.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = self.get_user_by_phone_number(username)
+        if user is None:
+            # Run the password hasher once to reduce the timing difference
+            # between an existing and a nonexistent user (#20760).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        user = cache.get(user_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(user_key(user_id), user, timeout())
+        return user if self.user_can_authenticate(user) else None
+
+    def get_user_by_phone_number(self, phone_number):
+        UserModel = get_user_model()
+        user_id = get_cache().get(phone_key(phone_number))
+        if user_id is not None:
+            user = self.get_user(user_id)
+            # The phone number may have changed since it was cached.
+            if user is not None and user.phone_number == phone_number:
+                return user
+        try:
+            user = UserModel._default_manager.get_by_natural_key(phone_number)
+        except UserModel.DoesNotExist:
+            return None
+        get_cache().set_many(
+            {phone_key(phone_number): user.pk, user_key(user.pk): user}, timeout()
+        )
+        return user
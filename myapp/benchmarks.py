@@ -0,0 +1,354 @@
+import io
+import math
+import random
+import statistics
+import time
+from django.contrib import admin
+from django.contrib.admin.templatetags.admin_list import results
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.backends import cached_db, db
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from . import jobs, scheduling
+from .auth import CachedModelBackend
+from .models import CustomUser, Course, Department, Enrollment, Job, Student
+from .pagination import AFTER_VAR, keyset_columns
+from .validation import BatchValidator
+
+# Dataset sizes for `benchmark --dataset`, passed to populate.
+DATASETS = {
+    "small": {
+        "departments": 5,
+        "teachers": 50,
+        "students": 1_000,
+        "courses": 100,
+        "classrooms": 20,
+    },
+    "medium": {
+        "departments": 20,
+        "teachers": 500,
+        "students": 50_000,
+        "courses": 1_000,
+        "classrooms": 200,
+    },
+    "large": {
+        "departments": 100,
+        "teachers": 5_000,
+        "students": 1_000_000,
+        "courses": 10_000,
+        "classrooms": 2_000,
+    },
+}
+
+# Rows rendered by the "render" scenario, the size of a large admin page.
+RENDERED_ROWS = 500
+
+# Each scenario returns {label: callable}; every callable is timed separately.
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[math.ceil(len(timings) * 0.95) - 1], 3),
+        "max_ms": round(timings[-1], 3),
+        "queries": len(captured),
+    }
+
+
+def superuser():
+    # Never saved: an active superuser passes every permission check without
+    # touching the database, keeping auth queries out of the numbers.
+    return CustomUser(
+        phone_number="+92-000000000-0",
+        is_active=True,
+        is_staff=True,
+        is_superuser=True,
+    )
+
+
+def seed(dataset):
+    """Replace the database contents with a ``DATASETS`` preset."""
+    call_command("clear_data", stdout=io.StringIO())
+    call_command("populate", seed=0, stdout=io.StringIO(), **DATASETS[dataset])
+
+
+def rolled_back(func):
+    """Wrap ``func`` so whatever it writes is rolled back after timing."""
+
+    def run():
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+
+    return run
+
+
+def changelist(model, **params):
+    """Return a callable that renders ``model``'s admin change list."""
+    model_admin = admin.site._registry[model]
+    factory = RequestFactory()
+
+    def run():
+        request = factory.get("/", params)
+        request.user = superuser()
+        model_admin.changelist_view(request).render()
+
+    return run
+
+
+def changelist_instance(model):
+    request = RequestFactory().get("/")
+    request.user = superuser()
+    return admin.site._registry[model].get_changelist_instance(request)
+
+
+def keyset_page(model, page):
+    """Return the change list parameters that show ``page`` by keyset.
+
+    The ``after`` cursor is the one a reader reaches by following Next from
+    the first page, taken from the last row of the page before. Keyset
+    change lists ignore ``p``, so deep pages must be measured this way.
+    """
+    cl = changelist_instance(model)
+    columns = keyset_columns(model, cl.queryset.query.order_by)
+    if columns is None:
+        raise ValueError(f"The {model.__name__} change list cannot seek.")
+    offset = (page - 1) * cl.list_per_page
+    if not offset:
+        return {}
+    return {AFTER_VAR: cl.cursor(columns, cl.queryset[offset - 1])}
+
+
+def offset_page(model, page):
+    """Return a callable fetching change list ``page`` with OFFSET, as ``p`` would."""
+    cl = changelist_instance(model)
+    offset = (page - 1) * cl.list_per_page
+    return lambda: list(cl.queryset[offset : offset + cl.list_per_page])
+
+
+def render_rows(model):
+    """Return a callable rendering ``RENDERED_ROWS`` change list rows.
+
+    The rows are fetched once up front, so only the per-row work of
+    ``list_display`` and the result_list template tag is timed.
+    """
+    cl = changelist_instance(model)
+    cl.formset = None
+    cl.result_list = list(cl.queryset[:RENDERED_ROWS])
+    return lambda: list(results(cl))
+
+
+def action(model, name, queryset):
+    """Return a callable that runs admin action ``name`` on ``queryset``."""
+    model_admin = admin.site._registry[model]
+    factory = RequestFactory()
+
+    def run():
+        request = factory.post("/")
+        request.user = superuser()
+        request._messages = CookieStorage(request)
+        func = model_admin.get_actions(request)[name][0]
+        func(model_admin, request, queryset)
+
+    return run
+
+
+def search_term(model_admin):
+    """Three letters of the first row's first search field, or None."""
+    value = (
+        model_admin.model._default_manager.exclude(
+            **{model_admin.search_fields[0]: ""}
+        )
+        .values_list(model_admin.search_fields[0], flat=True)
+        .first()
+    )
+    return value[:3] if value else None
+
+
+@scenario("changelists")
+def changelists():
+    return {
+        model._meta.model_name: changelist(model) for model in admin.site._registry
+    }
+
+
+@scenario("render")
+def render():
+    return {
+        f"{model._meta.model_name} {RENDERED_ROWS} rows": render_rows(model)
+        for model, model_admin in admin.site._registry.items()
+        if hasattr(model_admin, "delete_button")
+    }
+
+
+@scenario("search")
+def search():
+    runs = {}
+    for model, model_admin in admin.site._registry.items():
+        if not model_admin.search_fields:
+            continue
+        term = search_term(model_admin)
+        if term:
+            runs[f"{model._meta.model_name} q={term}"] = changelist(model, q=term)
+    return runs
+
+
+@scenario("make_uppercase")
+def make_uppercase():
+    runs = {}
+    for model, model_admin in admin.site._registry.items():
+        if "make_uppercase" not in (model_admin.actions or ()):
+            continue
+        page = model._default_manager.order_by("pk")[: model_admin.list_per_page]
+        queryset = model._default_manager.filter(
+            pk__in=list(page.values_list("pk", flat=True))
+        )
+        runs[model._meta.model_name] = rolled_back(
+            action(model, "make_uppercase", queryset)
+        )
+    return runs
+
+
+@scenario("delete_all")
+def delete_all():
+    def background():
+        jobs.delete_departments(Job.objects.create(kind=jobs.DELETE_DEPARTMENTS))
+
+    return {
+        "sync": rolled_back(lambda: Department.objects.all().delete()),
+        "background job": rolled_back(background),
+    }
+
+
+@scenario("populate")
+def populate():
+    options = DATASETS["small"]
+    return {
+        f"{options['students']} students": rolled_back(
+            lambda: call_command("populate", seed=0, stdout=io.StringIO(), **options)
+        )
+    }
+
+
+@scenario("clear_data")
+def clear_data():
+    return {
+        "all models": rolled_back(
+            lambda: call_command("clear_data", stdout=io.StringIO())
+        ),
+        "enrollments": rolled_back(
+            lambda: call_command(
+                "clear_data", models=["enrollment"], stdout=io.StringIO()
+            )
+        ),
+    }
+
+
+@scenario("validation")
+def validation():
+    today = timezone.now().date()
+    students = [
+        Student(
+            first_name="Bench",
+            last_name=f"Student{i}",
+            email=f"bench{i}@example.com",
+            enrollment_date=today,
+        )
+        for i in range(10_000)
+    ]
+    validator = BatchValidator(Student)
+
+    def full_clean():
+        for student in students:
+            student.full_clean(validate_unique=False)
+
+    return {
+        "full_clean 10k students": full_clean,
+        "BatchValidator 10k students": lambda: validator.validate(
+            [student.__dict__ for student in students]
+        ),
+    }
+
+
+@scenario("auth")
+def auth():
+    """The session and user lookups every authenticated request makes."""
+    # The benchmark user is kept between runs; it cannot log in.
+    user, _ = CustomUser.objects.get_or_create(
+        phone_number="+92-000000000-0", defaults={"password": "!"}
+    )
+    runs = {}
+    for name, engine in [("db", db), ("cached_db", cached_db)]:
+        session = engine.SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session.create()
+        key = session.session_key
+        runs[f"{name} session"] = lambda engine=engine, key=key: engine.SessionStore(
+            key
+        ).load()
+    for backend in [ModelBackend(), CachedModelBackend()]:
+        runs[type(backend).__name__] = lambda backend=backend: backend.get_user(
+            user.pk
+        )
+    return runs
+
+
+@scenario("enrollment_changelist")
+def enrollment_changelist():
+    per_page = admin.site._registry[Enrollment].list_per_page
+    pages = max(1, Enrollment.objects.count() // per_page)
+    course = Course.objects.order_by("pk").first()
+    runs = {"first page": changelist(Enrollment)}
+    for label, page in [("middle page", max(1, pages // 2)), ("last page", pages)]:
+        # The whole view, paged by keyset, against the query numbered pages
+        # would run instead.
+        runs[f"{label} keyset"] = changelist(
+            Enrollment, **keyset_page(Enrollment, page)
+        )
+        runs[f"{label} OFFSET query"] = offset_page(Enrollment, page)
+    if course is not None:
+        runs["course roster"] = lambda: list(course.enrollments.all()[:100])
+    return runs
+
+
+def synthetic_schedule(courses, rooms, departments, seed=0):
+    rng = random.Random(seed)
+    return (
+        [(i, rng.randint(1, 250), rng.randint(1, departments)) for i in range(courses)],
+        [(i, rng.randint(10, 300), rng.randint(1, departments)) for i in range(rooms)],
+    )
+
+
+@scenario("scheduling")
+def scheduling_scenario():
+    # Synthetic inputs, so the numbers do not depend on the database.
+    large = synthetic_schedule(50_000, 5_000, 50)
+    small = synthetic_schedule(200, 20, 5)
+    return {
+        "greedy 50k x 5k": lambda: scheduling.schedule_greedy(*large),
+        "greedy 200 x 20": lambda: scheduling.schedule_greedy(*small),
+        "matching 200 x 20": lambda: scheduling.schedule_matching(*small),
+    }
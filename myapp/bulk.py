@@ -0,0 +1,86 @@
+import time
+from itertools import islice
+from django.db import models, transaction
+from . import changes
+from .models import Change
+
+
+def batched(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def delete_rows(queryset, batch_size, progress=None):
+    """Delete ``queryset`` in primary key chunks without loading model instances.
+
+    Each chunk runs in its own short transaction and applies the CASCADE and
+    SET_NULL rules of the rows pointing at it with set-based statements,
+    instead of Django's deletion collector fetching every related row.
+    Deleted and nulled-out rows of the change feed's models are logged.
+    ``progress`` is called with the size of each committed chunk.
+    """
+    model = queryset.model
+    queryset = queryset.order_by().values_list("pk", flat=True)
+    deleted = 0
+    while True:
+        pks = list(queryset[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            for relation in model._meta.related_objects:
+                related = relation.related_model._base_manager.filter(
+                    **{f"{relation.field.name}__in": pks}
+                )
+                if relation.on_delete is models.CASCADE:
+                    delete_rows(related, batch_size)
+                elif relation.on_delete is models.SET_NULL:
+                    changes.log(
+                        related.model,
+                        related.values_list("pk", flat=True),
+                        Change.UPDATE,
+                        using=queryset.db,
+                    )
+                    related.update(**{relation.field.name: None})
+                elif relation.on_delete is not models.DO_NOTHING:
+                    raise ValueError(
+                        f"Cannot fast-delete {model.__name__}: "
+                        f"{relation.related_model.__name__}.{relation.field.name} "
+                        "uses an unsupported on_delete rule."
+                    )
+            changes.log(model, pks, Change.DELETE, using=queryset.db)
+            model._base_manager.filter(pk__in=pks)._raw_delete(queryset.db)
+        deleted += len(pks)
+        if progress:
+            progress(len(pks))
+
+
+class Throughput:
+    """Count rows written and report them as rows/sec."""
+
+    def __init__(self, label):
+        self.label = label
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows):
+        self.rows += rows
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.label}: {self.rows} rows in {self.elapsed:.2f}s "
+            f"({self.rate:,.0f} rows/sec)"
+        )
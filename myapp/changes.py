@@ -0,0 +1,293 @@
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from .models import Change, Course, Enrollment, Student
+
+# Tables in the change feed, by the name used in it (their API resource).
+TRACKED = {"students": Student, "courses": Course, "enrollments": Enrollment}
+BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10_000
+COMPACT_BATCH_SIZE = 50_000
+DEFAULT_RETENTION_DAYS = 7
+# Sequence numbers are taken when a change is logged but become visible when
+# its transaction commits, possibly after later ones. Feeds stop at changes
+# younger than this so consumers don't skip past a transaction still
+# committing; longer transactions can still be overtaken.
+SETTLE_SECONDS = 2
+TRIGGER_FUNCTION = "myapp_change_log"
+
+
+def use_triggers():
+    """Whether PostgreSQL triggers log the changes instead of signals.
+
+    Set CHANGE_LOG_TRIGGERS = True after running
+    ``compact_changes --install-triggers``. Triggers also see bulk_create,
+    queryset.update() and raw deletes, which the signal receivers miss.
+    """
+    return getattr(settings, "CHANGE_LOG_TRIGGERS", False)
+
+
+def retention_days():
+    return getattr(settings, "CHANGE_LOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+
+
+def tracked_name(model):
+    for name, tracked in TRACKED.items():
+        if model._meta.concrete_model is tracked:
+            return name
+    return None
+
+
+def changes_since(after=0, models=None, limit=BATCH_SIZE):
+    """Return up to ``limit`` changes with ids above ``after``, oldest first.
+
+    ``models`` restricts the feed to some of the TRACKED names. The result
+    ends before the first change younger than SETTLE_SECONDS; pass the id
+    of its last change as ``after`` to read the next batch.
+    """
+    queryset = Change.objects.filter(pk__gt=after).order_by("pk")
+    if models:
+        queryset = queryset.filter(model__in=models)
+    changes = list(queryset[:limit])
+    settled = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    for index, change in enumerate(changes):
+        if change.changed_at > settled:
+            return changes[:index]
+    return changes
+
+
+def serialize(changes, rows=True):
+    """Turn changes into dicts, with the current row unless ``rows`` is False.
+
+    Rows are read with one query per table; ``row`` is None for deletes and
+    for rows deleted since the change.
+    """
+    current = {}
+    if rows:
+        wanted = {}
+        for change in changes:
+            if change.action != Change.DELETE:
+                wanted.setdefault(change.model, set()).add(change.object_id)
+        for name, pks in wanted.items():
+            model = TRACKED[name]
+            fields = [field.attname for field in model._meta.concrete_fields]
+            for row in model._base_manager.filter(pk__in=pks).values(*fields):
+                current[name, row["id"]] = row
+    result = []
+    for change in changes:
+        entry = {
+            "seq": change.pk,
+            "model": change.model,
+            "id": change.object_id,
+            "action": change.action,
+            "changed_at": change.changed_at,
+        }
+        if rows:
+            entry["row"] = current.get((change.model, change.object_id))
+        result.append(entry)
+    return result
+
+
+def last_id(model):
+    """The highest primary key of ``model``, to snapshot the rows added after it."""
+    return model._base_manager.aggregate(last=Max("pk"))["last"] or 0
+
+
+def log(model, pks, action, using=None):
+    """Log ``action`` on the rows of ``model`` with primary keys ``pks``.
+
+    For bulk updates and deletes while the signal receivers are in charge;
+    does nothing for untracked models or when the triggers log changes.
+    Returns the number of changes logged.
+    """
+    name = tracked_name(model)
+    if name is None or use_triggers():
+        return 0
+    logged = Change.objects.using(using).bulk_create(
+        Change(model=name, object_id=pk, action=action) for pk in pks
+    )
+    return len(logged)
+
+
+def snapshot(models=None, after=0, action=Change.INSERT):
+    """Log every row of ``models`` with a primary key above ``after`` as ``action``.
+
+    For rows written by bulk operations while the signal receivers are in
+    charge, and for rows about to be truncated, which no trigger sees.
+    Returns the number of changes logged.
+    """
+    logged = 0
+    quote = connection.ops.quote_name
+    table = quote(Change._meta.db_table)
+    now = timezone.now()
+    for model in models or TRACKED.values():
+        name = tracked_name(model)
+        if name is None:
+            continue
+        source = quote(model._meta.db_table)
+        pk = quote(model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (model, object_id, action, changed_at) "
+                f"SELECT %s, {pk}, %s, %s FROM {source} WHERE {pk} > %s "
+                f"ORDER BY {pk}",
+                [name, action, now, after],
+            )
+            logged += cursor.rowcount
+    return logged
+
+
+def compact(retention=None, batch_size=COMPACT_BATCH_SIZE):
+    """Bound the log: drop superseded changes and deletes past retention.
+
+    The latest change of every existing row is kept, so reading from cursor
+    0 yields a full snapshot and a consumer at any cursor still sees every
+    row changed after it. Deletes are dropped ``retention`` days (default
+    CHANGE_LOG_RETENTION_DAYS) after they happen; consumers further behind
+    than that should rebuild from cursor 0. Returns ``(superseded, expired)``.
+    """
+    newer = Change.objects.filter(
+        model=OuterRef("model"), object_id=OuterRef("object_id"), pk__gt=OuterRef("pk")
+    )
+    pks = Change.objects.order_by("pk").values_list("pk", flat=True)
+    superseded = 0
+    start = 0
+    while True:
+        # Walk the log in primary key ranges, each in its own transaction.
+        bounds = list(pks.filter(pk__gt=start)[batch_size - 1 : batch_size])
+        batch = Change.objects.filter(pk__gt=start)
+        if bounds:
+            batch = batch.filter(pk__lte=bounds[0])
+        with transaction.atomic():
+            superseded += batch.filter(Exists(newer)).delete()[0]
+        if not bounds:
+            break
+        start = bounds[0]
+
+    if retention is None:
+        retention = retention_days()
+    cutoff = timezone.now() - timedelta(days=retention)
+    # Changes are logged in roughly chronological order, so everything up to
+    # the last one before the cutoff is old enough.
+    last = (
+        Change.objects.filter(changed_at__lt=cutoff)
+        .order_by("-pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    expired = 0
+    if last is not None:
+        expired = Change.objects.filter(pk__lte=last, action=Change.DELETE).delete()[0]
+    return superseded, expired
+
+
+def trigger_sql():
+    quote = connection.ops.quote_name
+    function = quote(TRIGGER_FUNCTION)
+    table = quote(Change._meta.db_table)
+    statements = [
+        f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO {table} (model, object_id, action, changed_at)
+                VALUES (TG_ARGV[0], OLD.id, 'delete', clock_timestamp());
+            ELSE
+                INSERT INTO {table} (model, object_id, action, changed_at)
+                VALUES (TG_ARGV[0], NEW.id, lower(TG_OP), clock_timestamp());
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    ]
+    for name, model in TRACKED.items():
+        source = quote(model._meta.db_table)
+        write = quote(f"{model._meta.db_table}_change_write")
+        update = quote(f"{model._meta.db_table}_change_update")
+        statements += [
+            f"DROP TRIGGER IF EXISTS {write} ON {source}",
+            f"DROP TRIGGER IF EXISTS {update} ON {source}",
+            f"""
+            CREATE TRIGGER {write} AFTER INSERT OR DELETE ON {source}
+            FOR EACH ROW EXECUTE FUNCTION {function}('{name}')
+            """,
+            f"""
+            CREATE TRIGGER {update} AFTER UPDATE ON {source}
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+            EXECUTE FUNCTION {function}('{name}')
+            """,
+        ]
+    return statements
+
+
+def drop_trigger_sql():
+    quote = connection.ops.quote_name
+    statements = []
+    for model in TRACKED.values():
+        source = quote(model._meta.db_table)
+        for suffix in ("write", "update"):
+            trigger = quote(f"{model._meta.db_table}_change_{suffix}")
+            statements.append(f"DROP TRIGGER IF EXISTS {trigger} ON {source}")
+    statements.append(f"DROP FUNCTION IF EXISTS {quote(TRIGGER_FUNCTION)}()")
+    return statements
+
+
+def install_triggers():
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in trigger_sql():
+            cursor.execute(sql)
+
+
+def drop_triggers():
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in drop_trigger_sql():
+            cursor.execute(sql)
+
+
+def saved(name):
+    def receiver(sender, instance, created, using, **kwargs):
+        Change.objects.using(using).create(
+            model=name,
+            object_id=instance.pk,
+            action=Change.INSERT if created else Change.UPDATE,
+        )
+
+    return receiver
+
+
+def deleted(name):
+    def receiver(sender, instance, using, **kwargs):
+        Change.objects.using(using).create(
+            model=name, object_id=instance.pk, action=Change.DELETE
+        )
+
+    return receiver
+
+
+def connect():
+    """Log changes from model signals, in the transaction making them.
+
+    Bulk operations bypass signals; follow inserts with snapshot() (as
+    import_data and populate do) and log updates and deletes with log() (as
+    the admin's bulk actions and bulk.delete_rows do), or install the
+    triggers.
+    """
+    if use_triggers():
+        return
+    for name, model in TRACKED.items():
+        senders = [
+            sender
+            for sender in apps.get_models()
+            if sender._meta.concrete_model is model
+        ]
+        for sender in senders:
+            uid = f"changes:{sender._meta.label}"
+            post_save.connect(saved(name), sender=sender, weak=False, dispatch_uid=uid)
+            post_delete.connect(
+                deleted(name), sender=sender, weak=False, dispatch_uid=uid
+            )
@@ -0,0 +1,216 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from .bulk import batched
+from .models import Classroom, Course, Department, Enrollment, Teacher
+
+
+class Counter:
+    """A column on ``model`` counting the ``child`` rows whose ``fk`` points at it."""
+
+    def __init__(self, model, field, child, fk):
+        self.model = model
+        self.field = field
+        self.child = child
+        self.fk = fk
+        self.attname = child._meta.get_field(fk).attname
+
+    def __str__(self):
+        return f"{self.model.__name__}.{self.field}"
+
+    def actual(self):
+        """Expression computing the true count for each ``model`` row."""
+        counts = (
+            self.child._base_manager.filter(**{self.fk: OuterRef("pk")})
+            .order_by()
+            .values(self.fk)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    def adjust(self, pk, delta, using=None):
+        if pk is None:
+            return
+        value = F(self.field) + delta
+        if delta < 0:
+            # A counter that has drifted low must not fail the delete that
+            # decrements it; recount repairs it.
+            value = Greatest(value, Value(0))
+        self.model._base_manager.using(using).filter(pk=pk).update(
+            **{self.field: value}
+        )
+
+    def drifted(self):
+        return self.model._base_manager.annotate(actual=self.actual()).exclude(
+            **{self.field: F("actual")}
+        )
+
+    def recount(self, dry_run=False, batch_size=1000):
+        """Fix the rows whose counter is wrong and return how many there were."""
+        pks = list(self.drifted().values_list("pk", flat=True))
+        if not dry_run:
+            for batch in batched(pks, batch_size):
+                self.model._base_manager.filter(pk__in=batch).update(
+                    **{self.field: self.actual()}
+                )
+        return len(pks)
+
+    def trigger_name(self):
+        return f"{self.model._meta.db_table}_{self.field}"
+
+    def trigger_sql(self):
+        quote = connection.ops.quote_name
+        name = quote(self.trigger_name())
+        parent = quote(self.model._meta.db_table)
+        child = quote(self.child._meta.db_table)
+        field = quote(self.field)
+        pk = quote(self.model._meta.pk.column)
+        fk = quote(self.child._meta.get_field(self.fk).column)
+        return [
+            f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE' AND OLD.{fk} IS NOT DISTINCT FROM NEW.{fk} THEN
+                    RETURN NULL;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.{fk} IS NOT NULL THEN
+                    UPDATE {parent} SET {field} = GREATEST({field} - 1, 0)
+                    WHERE {pk} = OLD.{fk};
+                END IF;
+                IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.{fk} IS NOT NULL THEN
+                    UPDATE {parent} SET {field} = {field} + 1 WHERE {pk} = NEW.{fk};
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            f"DROP TRIGGER IF EXISTS {name} ON {child}",
+            f"""
+            CREATE TRIGGER {name} AFTER INSERT OR DELETE OR UPDATE OF {fk}
+            ON {child} FOR EACH ROW EXECUTE FUNCTION {name}()
+            """,
+        ]
+
+    def drop_trigger_sql(self):
+        name = connection.ops.quote_name(self.trigger_name())
+        table = connection.ops.quote_name(self.child._meta.db_table)
+        return [
+            f"DROP TRIGGER IF EXISTS {name} ON {table}",
+            f"DROP FUNCTION IF EXISTS {name}()",
+        ]
+
+
+COUNTERS = [
+    Counter(Course, "enrollment_count", Enrollment, "course"),
+    Counter(Department, "teacher_count", Teacher, "department"),
+    Counter(Department, "classroom_count", Classroom, "department"),
+]
+
+
+def use_triggers():
+    """Whether database triggers maintain the counters instead of signals.
+
+    Set COUNTER_TRIGGERS = True after running ``recount --install-triggers``
+    on PostgreSQL. Triggers also see bulk_create, queryset.update() and raw
+    deletes, which the signal receivers miss.
+    """
+    return getattr(settings, "COUNTER_TRIGGERS", False)
+
+
+def recount(models=None, dry_run=False):
+    """Repair the counters touching ``models`` (default: all of them).
+
+    Returns ``{counter: rows fixed}``.
+    """
+    return {
+        counter: counter.recount(dry_run)
+        for counter in COUNTERS
+        if models is None or counter.model in models or counter.child in models
+    }
+
+
+def install_triggers():
+    with transaction.atomic(), connection.cursor() as cursor:
+        for counter in COUNTERS:
+            for sql in counter.trigger_sql():
+                cursor.execute(sql)
+
+
+def drop_triggers():
+    with transaction.atomic(), connection.cursor() as cursor:
+        for counter in COUNTERS:
+            for sql in counter.drop_trigger_sql():
+                cursor.execute(sql)
+
+
+def remember_previous(counter):
+    def receiver(sender, instance, update_fields=None, using=None, **kwargs):
+        if instance._state.adding or instance.pk is None:
+            return
+        if update_fields is not None and counter.fk not in update_fields:
+            return
+        previous = (
+            sender._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values_list(counter.attname, flat=True)
+            .first()
+        )
+        instance.__dict__.setdefault("_counter_previous", {})[counter] = previous
+
+    return receiver
+
+
+def saved(counter):
+    def receiver(sender, instance, created, using, **kwargs):
+        current = getattr(instance, counter.attname)
+        with transaction.atomic(using=using):
+            if created:
+                counter.adjust(current, 1, using)
+                return
+            previous = instance.__dict__.get("_counter_previous", {}).pop(
+                counter, current
+            )
+            if previous != current:
+                counter.adjust(previous, -1, using)
+                counter.adjust(current, 1, using)
+
+    return receiver
+
+
+def deleted(counter):
+    def receiver(sender, instance, using, **kwargs):
+        counter.adjust(getattr(instance, counter.attname), -1, using)
+
+    return receiver
+
+
+def connect():
+    """Keep the counters up to date from model signals.
+
+    Updates run in the same transaction as the change when the caller (the
+    admin, or Model.delete()) already has one open. Bulk operations bypass
+    signals; follow them with recount().
+    """
+    if use_triggers():
+        return
+    for counter in COUNTERS:
+        senders = [
+            model
+            for model in apps.get_models()
+            if model._meta.concrete_model is counter.child
+        ]
+        for sender in senders:
+            uid = f"{counter}:{sender._meta.label}"
+            pre_save.connect(
+                remember_previous(counter), sender=sender, weak=False, dispatch_uid=uid
+            )
+            post_save.connect(
+                saved(counter), sender=sender, weak=False, dispatch_uid=uid
+            )
+            post_delete.connect(
+                deleted(counter), sender=sender, weak=False, dispatch_uid=uid
+            )
@@ -0,0 +1,81 @@
+import uuid
+from django.apps import apps
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from .models import (
+    Classroom,
+    Course,
+    CustomUser,
+    Department,
+    Enrollment,
+    Student,
+    Teacher,
+)
+
+# The alias {% cache %} uses. Version stamps live next to the fragments, so
+# every process sharing the fragments also shares the stamps.
+CACHE_ALIAS = "template_fragments"
+# Models whose saves and deletes bump their version stamp.
+TRACKED = [Department, Teacher, Student, Course, Classroom, Enrollment, CustomUser]
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def version_key(model):
+    return f"version:{model._meta.concrete_model._meta.label_lower}"
+
+
+def new_stamp():
+    # Random rather than incremented: a stamp evicted from the cache and
+    # recreated can never match fragments cached under an earlier one.
+    return uuid.uuid4().hex
+
+
+def versions(models):
+    """Return the version stamps of ``models`` in a stable order."""
+    cache = get_cache()
+    keys = sorted({version_key(model) for model in models})
+    stamps = cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        stamps.update(missing)
+    return [stamps[key] for key in keys]
+
+
+def bump(models=None, using=None):
+    """Give ``models`` (default: all TRACKED) new version stamps on commit.
+
+    Bumping only after the transaction commits keeps a concurrent request
+    from caching the old rows under the new stamp.
+    """
+    keys = {version_key(model) for model in (TRACKED if models is None else models)}
+    transaction.on_commit(
+        lambda: get_cache().set_many(dict.fromkeys(keys, new_stamp()), timeout=None),
+        using=using,
+    )
+
+
+def changed(sender, using, **kwargs):
+    bump([sender], using=using)
+
+
+def connect():
+    """Bump a TRACKED model's stamp whenever one of its rows is saved or deleted.
+
+    Receivers are connected per model: a receiver for every sender would
+    keep Django from fast-deleting any model, tracked or not.
+    """
+    for model in TRACKED:
+        senders = [
+            sender
+            for sender in apps.get_models()
+            if sender._meta.concrete_model is model
+        ]
+        for sender in senders:
+            uid = f"fragments:{sender._meta.label}"
+            post_save.connect(changed, sender=sender, dispatch_uid=uid)
+            post_delete.connect(changed, sender=sender, dispatch_uid=uid)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+# The algorithm names are unchanged, so hashes stay readable by Django's own
+# hashers. Changing a cost setting makes must_update() true for older hashes,
+# which Django rehashes the next time the user logs in.
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with costs from PASSWORD_ARGON2 (needs argon2-cffi)."""
+
+    def __init__(self):
+        options = getattr(settings, "PASSWORD_ARGON2", {})
+        self.time_cost = options.get("time_cost", self.time_cost)
+        self.memory_cost = options.get("memory_cost", self.memory_cost)
+        self.parallelism = options.get("parallelism", self.parallelism)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with costs from PASSWORD_SCRYPT."""
+
+    def __init__(self):
+        options = getattr(settings, "PASSWORD_SCRYPT", {})
+        self.work_factor = options.get("work_factor", self.work_factor)
+        self.block_size = options.get("block_size", self.block_size)
+        self.parallelism = options.get("parallelism", self.parallelism)
+        self.maxmem = options.get("maxmem", self.maxmem)
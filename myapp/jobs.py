@@ -0,0 +1,113 @@
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from . import fragments
+from .bulk import delete_rows
+from .models import Department, Job
+
+DELETE_DEPARTMENTS = "delete_departments"
+DELETE_BATCH_SIZE = 500
+# A running job whose worker has not checked in for this long is presumed dead.
+DEFAULT_STALE_SECONDS = 600
+
+
+def stale_seconds():
+    return getattr(settings, "JOB_STALE_SECONDS", DEFAULT_STALE_SECONDS)
+
+
+def heartbeat(job, processed=0):
+    """Record that ``job`` is still running, adding ``processed`` to its progress."""
+    Job.objects.filter(pk=job.pk).update(
+        processed=F("processed") + processed, heartbeat_at=timezone.now()
+    )
+
+
+def delete_departments(job):
+    job.total = Department.objects.count()
+    job.save(update_fields=["total"])
+
+    def progress(count):
+        heartbeat(job, count)
+
+    delete_rows(Department.objects.all(), DELETE_BATCH_SIZE, progress)
+    fragments.bump()
+
+
+HANDLERS = {
+    DELETE_DEPARTMENTS: delete_departments,
+}
+
+
+def stale(now=None):
+    """Running jobs whose worker has not checked in for stale_seconds()."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=stale_seconds())
+    return Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff)
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=Job.RUNNING,
+    )
+
+
+def active(kind):
+    """Pending and running jobs of ``kind``, leaving out stale ones.
+
+    A worker killed mid-job leaves it running until fail_stale() runs; it
+    must not keep enqueue() from queueing that kind again meanwhile.
+    """
+    return Job.objects.filter(
+        kind=kind, status__in=[Job.PENDING, Job.RUNNING]
+    ).exclude(pk__in=stale().values("pk"))
+
+
+def fail_stale():
+    """Mark stale running jobs as failed; run_jobs does this on every poll.
+
+    Returns how many failed.
+    """
+    now = timezone.now()
+    return stale(now).update(
+        status=Job.FAILED,
+        error=f"No heartbeat for {stale_seconds()} seconds; the worker stopped.",
+        finished_at=now,
+    )
+
+
+def enqueue(kind):
+    """Queue a job of ``kind``, reusing one that is already pending or running."""
+    return active(kind).first() or Job.objects.create(kind=kind)
+
+
+def active_job(kind):
+    return active(kind).order_by("created_at").first()
+
+
+def claim_next():
+    """Mark the oldest pending job as running and return it.
+
+    The status check in the UPDATE lets several workers poll the same queue
+    without picking up the same job twice.
+    """
+    for job in Job.objects.filter(status=Job.PENDING).order_by("created_at")[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.PENDING).update(
+            status=Job.RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run(job):
+    try:
+        HANDLERS[job.kind](job)
+    except Exception:
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+    return job
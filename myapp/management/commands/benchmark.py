@@ -0,0 +1,119 @@
+import json
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from myapp.benchmarks import DATASETS, SCENARIOS, measure, seed
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time admin pages, management commands and other hot paths against the "
+        "current database. Seed it first, e.g. `populate --students 3500000 "
+        "--courses 5000` for roughly 10M enrollments, or pass --dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios",
+            nargs="*",
+            help=f"Scenarios to run (default: all): {', '.join(sorted(SCENARIOS))}.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--dataset",
+            choices=list(DATASETS),
+            help="Clear the database and populate it with this preset first.",
+        )
+        parser.add_argument(
+            "--output", help="Write machine-readable results to this JSON file."
+        )
+        parser.add_argument(
+            "--compare",
+            help="A previous --output file; fail if any result got slower or "
+            "ran more queries.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed median slowdown for --compare (default: 0.2, i.e. 20%%).",
+        )
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or sorted(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if options["dataset"]:
+            self.stdout.write(f"Seeding the {options['dataset']} dataset...")
+            seed(options["dataset"])
+
+        results = []
+        for name in names:
+            for label, func in SCENARIOS[name]().items():
+                result = {"scenario": name, "label": label}
+                result.update(measure(func, options["repeat"]))
+                results.append(result)
+                self.stdout.write(
+                    "{:<22} {:<32} median {:>10.2f} ms  p95 {:>10.2f} ms  "
+                    "{:>5} queries".format(
+                        name,
+                        label,
+                        result["median_ms"],
+                        result["p95_ms"],
+                        result["queries"],
+                    )
+                )
+
+        if options["output"]:
+            report = {
+                "created_at": timezone.now().isoformat(),
+                "commit": current_commit(),
+                "vendor": connection.vendor,
+                "dataset": options["dataset"],
+                "results": results,
+            }
+            with open(options["output"], "w") as out:
+                json.dump(report, out, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["threshold"])
+
+    def compare(self, results, path, threshold):
+        with open(path) as f:
+            baseline = {
+                (row["scenario"], row["label"]): row for row in json.load(f)["results"]
+            }
+        regressions = 0
+        for result in results:
+            before = baseline.get((result["scenario"], result["label"]))
+            if before is None:
+                continue
+            slower = result["median_ms"] > before["median_ms"] * (1 + threshold)
+            more_queries = result["queries"] > before["queries"]
+            if slower or more_queries:
+                regressions += 1
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"{result['scenario']} {result['label']}: median "
+                        f"{before['median_ms']:.2f} -> {result['median_ms']:.2f} ms, "
+                        f"queries {before['queries']} -> {result['queries']}"
+                    )
+                )
+        if regressions:
+            raise CommandError(f"{regressions} results regressed against {path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}."))
@@ -0,0 +1,61 @@
+import json
+import sys
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from myapp import changes
+from myapp.bulk import Throughput
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the change feed after a cursor as JSON lines, with each changed "
+        "row's current values, until caught up. Store the cursor printed at the "
+        "end and pass it to the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "cursor",
+            type=int,
+            nargs="?",
+            default=0,
+            help="Sequence number to continue after; 0 reads every logged row.",
+        )
+        parser.add_argument("--model", action="append", choices=sorted(changes.TRACKED))
+        parser.add_argument("--output", default="-", help="File to write, or '-'.")
+        parser.add_argument("--batch-size", type=int, default=changes.BATCH_SIZE)
+        parser.add_argument("--limit", type=int, help="Stop after this many changes.")
+        parser.add_argument(
+            "--ids-only",
+            action="store_true",
+            help="Leave out the rows' current values.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+        try:
+            cursor, stats = self.stream(out, options)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        # Keep the report out of the feed on stdout.
+        report = self.stderr if path == "-" else self.stdout
+        report.write(f"{stats}; next cursor: {cursor}")
+
+    def stream(self, out, options):
+        cursor = options["cursor"]
+        limit = options["limit"]
+        stats = Throughput("Read changes")
+        while limit is None or stats.rows < limit:
+            size = options["batch_size"]
+            if limit is not None:
+                size = min(size, limit - stats.rows)
+            batch = changes.changes_since(cursor, options["model"], size)
+            if not batch:
+                break
+            for entry in changes.serialize(batch, rows=not options["ids_only"]):
+                out.write(json.dumps(entry, cls=DjangoJSONEncoder) + "\n")
+            cursor = batch[-1].pk
+            stats.add(len(batch))
+        return cursor, stats
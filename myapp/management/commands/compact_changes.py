@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from myapp import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep the change log bounded: drop changes superseded by a later one "
+        "for the same row, and deletes older than the retention period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            help="Keep deletes this long (default: CHANGE_LOG_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="First log every student, course and enrollment as an insert, "
+            "after bulk operations the signal receivers missed.",
+        )
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            "--install-triggers",
+            action="store_true",
+            help="Log changes with PostgreSQL triggers. Set "
+            "CHANGE_LOG_TRIGGERS = True as well so the signal handlers stop.",
+        )
+        group.add_argument("--drop-triggers", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["install_triggers"] or options["drop_triggers"]:
+            if connection.vendor != "postgresql":
+                raise CommandError("Change log triggers require PostgreSQL.")
+            if options["install_triggers"]:
+                changes.install_triggers()
+                self.stdout.write("Installed change log triggers.")
+            else:
+                changes.drop_triggers()
+                self.stdout.write("Dropped change log triggers.")
+
+        if options["snapshot"]:
+            logged = changes.snapshot()
+            self.stdout.write(f"Logged {logged} rows.")
+        superseded, expired = changes.compact(options["retention_days"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Removed {superseded} superseded changes and {expired} expired "
+                "deletes."
+            )
+        )
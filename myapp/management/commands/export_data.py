@@ -0,0 +1,35 @@
+import sys
+from django.core.management.base import BaseCommand
+from myapp.bulk import Throughput
+from myapp.transfer import FORMATS, SPECS, export_rows, guess_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a myapp table to a CSV or JSONL file. Uses COPY TO STDOUT on "
+        "PostgreSQL and a chunked iterator() elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(SPECS))
+        parser.add_argument(
+            "path", nargs="?", default="-", help="File to write, or '-' for stdout."
+        )
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        spec = SPECS[options["model"]]
+        stats = Throughput(f"Exported {options['model']}")
+
+        if path == "-":
+            export_rows(spec, sys.stdout, fmt, stats, options["batch_size"])
+            # Keep the report out of the exported data.
+            self.stderr.write(str(stats))
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            export_rows(spec, out, fmt, stats, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(str(stats)))
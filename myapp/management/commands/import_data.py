@@ -0,0 +1,82 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from myapp import changes, counters, fragments
+from myapp.bulk import Throughput
+from myapp.transfer import FORMATS, SPECS, Importer, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream rows from a CSV or JSONL file into a myapp table. Uses COPY FROM "
+        "STDIN on PostgreSQL and batched bulk_create elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(SPECS))
+        parser.add_argument("path", help="File to read, or '-' for stdin.")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Skip rows that fail validation instead of aborting.",
+        )
+        parser.add_argument(
+            "--link",
+            action="store_true",
+            help=(
+                "Second pass over a file already imported: set the references "
+                "left empty the first time (department heads, once the "
+                "teachers are loaded)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        spec = SPECS[options["model"]]
+        importer = Importer(spec, options["batch_size"], options["skip_invalid"])
+        stats = Throughput(f"Imported {options['model']}")
+        last_id = changes.last_id(spec.model)
+
+        if path == "-":
+            fileobj = sys.stdin
+        else:
+            fileobj = open(path, newline="", encoding="utf-8")
+        try:
+            if options["link"]:
+                importer.link(read_rows(fileobj, fmt), stats)
+            else:
+                importer.run(read_rows(fileobj, fmt), stats)
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if fileobj is not sys.stdin:
+                fileobj.close()
+        fragments.bump()
+        if not options["link"]:
+            counters.recount([spec.model])
+            if not changes.use_triggers():
+                changes.snapshot([spec.model], after=last_id)
+
+        if importer.deferred:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{importer.deferred} references to tables imported later "
+                    "were left empty. Import those tables, then run this "
+                    "command again with --link."
+                )
+            )
+
+        if importer.unresolved:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{importer.unresolved} references did not match an existing "
+                    "row and were left empty."
+                )
+            )
+        if importer.invalid:
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {importer.invalid} invalid rows.")
+            )
+        self.stdout.write(self.style.SUCCESS(str(stats)))
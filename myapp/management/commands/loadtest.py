@@ -0,0 +1,148 @@
+import asyncio
+import json
+import math
+import statistics
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+async def fetch(host, port, request):
+    """Send one HTTP/1.1 request on a fresh connection and return the status."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        # Drain the body; the server closes the connection when it is done.
+        while await reader.read(65536):
+            pass
+    finally:
+        writer.close()
+    return int(status_line.split(b" ", 2)[1])
+
+
+async def run_load(url, concurrency, total, headers, timeout):
+    parts = urlsplit(url)
+    if parts.scheme != "http":
+        raise CommandError("Only http:// URLs are supported.")
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    lines.extend(headers)
+    request = ("\r\n".join(lines) + "\r\n\r\n").encode()
+    host, port = parts.hostname, parts.port or 80
+
+    latencies = []
+    statuses = {}
+    remaining = total
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(fetch(host, port, request), timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = "error"
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def database_sessions():
+    """Sessions ever opened on this PostgreSQL database (PostgreSQL 14+)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sessions FROM pg_stat_database WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0]
+
+
+def percentile(values, fraction):
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent GET requests at a running server and report "
+        "throughput and latency percentiles. Run it once against the WSGI "
+        "server and once against the ASGI server (custom_models.asgi) to "
+        "compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="e.g. http://127.0.0.1:8000/api/courses/1/")
+        parser.add_argument("--concurrency", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help="Extra request header, e.g. 'Cookie: sessionid=...'.",
+        )
+        parser.add_argument(
+            "--count-db-sessions",
+            action="store_true",
+            help="Report how many PostgreSQL connections the server opened "
+            "during the run, to compare CONN_MAX_AGE and DB_POOL settings. The "
+            "server must use the same database as this command.",
+        )
+        parser.add_argument("--label", default="", help="Name for this run.")
+        parser.add_argument("--output", help="Append the result to this JSON file.")
+
+    def handle(self, *args, **options):
+        for option in ["requests", "concurrency"]:
+            if options[option] < 1:
+                raise CommandError(f"--{option} must be at least 1.")
+        count_sessions = options["count_db_sessions"]
+        if count_sessions:
+            if connection.vendor != "postgresql":
+                raise CommandError("--count-db-sessions requires PostgreSQL.")
+            sessions_before = database_sessions()
+            # Keep this command's own connection out of the count.
+            connection.close()
+        latencies, statuses, elapsed = asyncio.run(
+            run_load(
+                options["url"],
+                options["concurrency"],
+                options["requests"],
+                options["header"],
+                options["timeout"],
+            )
+        )
+        latencies.sort()
+        result = {
+            "label": options["label"],
+            "url": options["url"],
+            "concurrency": options["concurrency"],
+            "requests": len(latencies),
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+        if count_sessions:
+            # Minus the connection this query reopens.
+            result["db_sessions"] = database_sessions() - sessions_before - 1
+        for key, value in result.items():
+            self.stdout.write(f"{key:<16} {value}")
+
+        if options["output"]:
+            try:
+                with open(options["output"]) as f:
+                    results = json.load(f)
+            except FileNotFoundError:
+                results = []
+            results.append(result)
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
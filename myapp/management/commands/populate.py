@@ -1,92 +1,234 @@
 # myapp/management/commands/populate.py
 import random
-from django.core.management.base import BaseCommand
+import string
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
 from faker import Faker
-from myapp.models import Teacher, Student, Course, Department, Classroom, Enrollment, CustomUser
+from myapp import changes, counters, fragments
+from myapp.profiling import profile_command
+from myapp.bulk import Throughput, batched
+from myapp.validation import BatchValidator
+from myapp.models import Teacher, Student, Course, Department, Classroom, Enrollment
+
+# Size of the name/word pools drawn from Faker; generating one Faker value per
+# row is far slower than the inserts themselves at millions of rows.
+POOL_SIZE = 1000
+MAX_COURSES = 26**3 * 1000
+
+
+def course_code(index):
+    """Return the unique 'XXX123' course code for ``index``."""
+    letters, digits = divmod(index, 1000)
+    chars = []
+    for _ in range(3):
+        letters, remainder = divmod(letters, 26)
+        chars.append(string.ascii_uppercase[remainder])
+    return "".join(reversed(chars)) + f"{digits:03d}"
+
+
+def first_index(model):
+    """Where to start numbering the unique values of new ``model`` rows.
+
+    Primary keys only grow, and every run numbers from the highest one, so
+    repeated runs do not collide even after rows were deleted; the row
+    count would shrink and hand out numbers already in use.
+    """
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
 
 class Command(BaseCommand):
     help = "Populate the database with fake data"
 
-    def handle(self, *args, **kwargs):
-        fake = Faker()
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=5)
+        parser.add_argument("--teachers", type=int, default=5)
+        parser.add_argument("--students", type=int, default=5)
+        parser.add_argument("--courses", type=int, default=5)
+        parser.add_argument("--classrooms", type=int, default=5)
+        parser.add_argument(
+            "--max-courses-per-student",
+            type=int,
+            default=5,
+            help="Each student is enrolled in 1 to N distinct courses.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--seed", type=int, default=None, help="Seed for reproducible data."
+        )
 
-        # Create Departments
-        departments = []
-        for _ in range(5):
-            department = Department.objects.create(
-                name=fake.company(),
-                location=fake.city(),
-                head=None 
+    @profile_command
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(
+                "populate needs a database that returns primary keys from "
+                "bulk inserts (PostgreSQL or SQLite 3.35+)."
             )
-            departments.append(department)
-
-        # Create Teachers
-        teachers = []
-        for _ in range(5):
-            teacher = Teacher.objects.create(
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                email=fake.unique.email(),
-                department=random.choice(departments)  
+        if min(options["departments"], options["teachers"], options["courses"]) < 1:
+            raise CommandError(
+                "At least one department, teacher and course is required."
             )
-            teachers.append(teacher)
-
-        # Update Departments with a random head
-        for department in departments:
-            department.head = random.choice(teachers)  
-            department.save()
-
-        # Create Students
-        students = []
-        for _ in range(5):
-            student = Student.objects.create(
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                email=fake.unique.email(),
-                enrollment_date=fake.date_between(start_date='-2y', end_date='today')
+
+        self.batch_size = options["batch_size"]
+        self.rng = random.Random(options["seed"])
+        fake = Faker()
+        fake.seed_instance(options["seed"])
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.words = [fake.word() for _ in range(POOL_SIZE)]
+        self.companies = [fake.company() for _ in range(POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(POOL_SIZE)]
+        self.today = timezone.now().date()
+        self.validators = {}
+
+        # One transaction, so a failed run leaves nothing half-populated.
+        with transaction.atomic():
+            self.populate(options)
+
+        self.stdout.write(self.style.SUCCESS('Successfully populated the database with fake data.'))
+
+    def populate(self, options):
+        last_ids = {model: changes.last_id(model) for model in changes.TRACKED.values()}
+        department_ids = self.create_departments(options["departments"])
+        teacher_ids = self.create_teachers(options["teachers"], department_ids)
+        self.assign_department_heads(department_ids, teacher_ids)
+        course_ids = self.create_courses(options["courses"], teacher_ids)
+        self.create_classrooms(options["classrooms"], department_ids)
+        self.create_students_and_enrollments(
+            options["students"], course_ids, options["max_courses_per_student"]
+        )
+        # bulk_create bypasses the signals that maintain the counters.
+        counters.recount()
+        fragments.bump()
+        if not changes.use_triggers():
+            for model, last_id in last_ids.items():
+                changes.snapshot([model], after=last_id)
+
+    def validate(self, model, batch):
+        validator = self.validators.get(model)
+        if validator is None:
+            validator = self.validators[model] = BatchValidator(model)
+        errors = validator.validate([obj.__dict__ for obj in batch])
+        if errors:
+            index = min(errors)
+            raise CommandError(
+                f"Generated an invalid {model.__name__}: {'; '.join(errors[index])}"
             )
-            students.append(student)
-
-        # Create Courses
-        courses = []
-        for _ in range(5):
-            course = Course.objects.create(
-                name=fake.word(),
-                code=fake.unique.bothify(text='???###', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ'),
-                teacher=None 
+
+    def insert(self, model, rows, label):
+        """Bulk insert ``rows`` in batches and return the new primary keys."""
+        stats = Throughput(label)
+        ids = []
+        for batch in batched(rows, self.batch_size):
+            self.validate(model, batch)
+            model.objects.bulk_create(batch)
+            ids.extend(obj.pk for obj in batch)
+            stats.add(len(batch))
+        self.stdout.write(str(stats))
+        return ids
+
+    def random_date(self, days):
+        return self.today - timedelta(days=self.rng.randint(0, days))
+
+    def create_departments(self, count):
+        rows = (
+            Department(
+                name=self.rng.choice(self.companies),
+                location=self.rng.choice(self.cities),
+                head=None,
             )
-            courses.append(course)
-
-        # Update Courses with a random teacher
-        for course in courses:
-            course.teacher = random.choice(teachers) 
-            course.save()
-
-        # Create Classrooms
-        classrooms = []
-        for _ in range(5):
-            classroom = Classroom.objects.create(
-                room_number=fake.unique.random_int(min=100, max=999),
-                capacity=random.randint(1, 100),
-                department=None  
+            for _ in range(count)
+        )
+        return self.insert(Department, rows, "Departments")
+
+    def create_teachers(self, count, department_ids):
+        offset = first_index(Teacher)
+        rows = (
+            Teacher(
+                first_name=self.rng.choice(self.first_names),
+                last_name=self.rng.choice(self.last_names),
+                email=f"teacher{i}@example.com",
+                department_id=self.rng.choice(department_ids),
             )
-            classrooms.append(classroom)
+            for i in range(offset, offset + count)
+        )
+        return self.insert(Teacher, rows, "Teachers")
+
+    def assign_department_heads(self, department_ids, teacher_ids):
+        # Department.head and Teacher.department point at each other, so one
+        # side has to be filled in after both tables exist.
+        stats = Throughput("Department heads")
+        for batch in batched(department_ids, self.batch_size):
+            departments = [
+                Department(pk=pk, head_id=self.rng.choice(teacher_ids)) for pk in batch
+            ]
+            Department.objects.bulk_update(departments, ["head"])
+            stats.add(len(departments))
+        self.stdout.write(str(stats))
 
-        # Update Classrooms with a random department
-        for classroom in classrooms:
-            classroom.department = random.choice(departments)  # Assign a random department
-            classroom.save()
+    def create_courses(self, count, teacher_ids):
+        offset = first_index(Course)
+        if offset + count > MAX_COURSES:
+            raise CommandError("Too many courses for the 'XXX123' code format.")
+        rows = (
+            Course(
+                name=self.rng.choice(self.words),
+                code=course_code(i),
+                teacher_id=self.rng.choice(teacher_ids),
+            )
+            for i in range(offset, offset + count)
+        )
+        return self.insert(Course, rows, "Courses")
 
-        # Create Enrollments
-        for student in students:
-            num_courses = random.randint(1, 5)  # Set range to 1-5
-            selected_courses = random.sample(courses, k=min(num_courses, len(courses)))  
+    def create_classrooms(self, count, department_ids):
+        offset = first_index(Classroom)
+        rows = (
+            Classroom(
+                room_number=str(100 + i),
+                capacity=self.rng.randint(1, 100),
+                department_id=self.rng.choice(department_ids),
+            )
+            for i in range(offset, offset + count)
+        )
+        return self.insert(Classroom, rows, "Classrooms")
 
-            for course in selected_courses:
-                Enrollment.objects.create(
-                    student=student,
-                    course=course,
-                    enrollment_date=fake.date_between(start_date='-1y', end_date='today')
-                )
+    def create_students_and_enrollments(self, count, course_ids, max_courses):
+        # Students are written one batch at a time and their enrollments are
+        # generated straight away, so only one batch of each is held in memory.
+        students = Throughput("Students")
+        enrollments = Throughput("Enrollments")
+        max_courses = max(1, min(max_courses, len(course_ids)))
+        offset = first_index(Student)
+        rows = (
+            Student(
+                first_name=self.rng.choice(self.first_names),
+                last_name=self.rng.choice(self.last_names),
+                email=f"student{i}@example.com",
+                enrollment_date=self.random_date(730),
+            )
+            for i in range(offset, offset + count)
+        )
+        for batch in batched(rows, self.batch_size):
+            self.validate(Student, batch)
+            Student.objects.bulk_create(batch)
+            students.add(len(batch))
 
-        self.stdout.write(self.style.SUCCESS('Successfully populated the database with fake data.'))
+            pending = []
+            for student in batch:
+                num_courses = self.rng.randint(1, max_courses)
+                for course_id in self.rng.sample(course_ids, k=num_courses):
+                    pending.append(
+                        Enrollment(
+                            student_id=student.pk,
+                            course_id=course_id,
+                            enrollment_date=self.random_date(365),
+                        )
+                    )
+            for chunk in batched(pending, self.batch_size):
+                self.validate(Enrollment, chunk)
+                Enrollment.objects.bulk_create(chunk)
+                enrollments.add(len(chunk))
+        self.stdout.write(str(students))
+        self.stdout.write(str(enrollments))
@@ -0,0 +1,124 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from myapp import fragments
+from myapp.bulk import Throughput, batched
+from myapp.models import CustomUser
+from myapp.transfer import FORMATS, guess_format, read_rows
+from myapp.validation import BatchValidator
+
+FIELDS = ["phone_number", "first_name", "last_name"]
+
+
+def setup_worker():
+    # Workers that are spawned rather than forked (macOS, Windows) start
+    # without Django configured.
+    if not apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV or JSONL file with a phone_number column and "
+        "optional password, first_name and last_name columns. Passwords are "
+        "hashed in parallel worker processes; users without one get an "
+        "unusable password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or '-' for stdin.")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes hashing passwords (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Skip rows that fail validation instead of aborting.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        fileobj = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            with ProcessPoolExecutor(
+                options["workers"], initializer=setup_worker
+            ) as pool:
+                self.provision(read_rows(fileobj, fmt), pool, options)
+        finally:
+            if fileobj is not sys.stdin:
+                fileobj.close()
+
+    def provision(self, records, pool, options):
+        validator = BatchValidator(CustomUser, FIELDS)
+        stats = Throughput("Provisioned users")
+        seen = set()
+        invalid = skipped = 0
+        first = 1
+        for batch in batched(records, options["batch_size"]):
+            rows = []
+            for number, record in enumerate(batch, start=first):
+                if "phone_number" not in record:
+                    raise CommandError(f"Row {number}: missing column 'phone_number'.")
+                row = {name: (record.get(name) or "").strip() for name in FIELDS}
+                row["password"] = record.get("password") or None
+                rows.append(row)
+
+            errors = validator.validate(rows)
+            if errors and not options["skip_invalid"]:
+                index = min(errors)
+                raise CommandError(f"Row {first + index}: {'; '.join(errors[index])}")
+            invalid += len(errors)
+            first += len(batch)
+            rows = [row for index, row in enumerate(rows) if index not in errors]
+
+            # Skip phone numbers repeated in the file or already registered.
+            existing = set(
+                CustomUser.objects.filter(
+                    phone_number__in=[row["phone_number"] for row in rows]
+                ).values_list("phone_number", flat=True)
+            )
+            new_rows = []
+            for row in rows:
+                if row["phone_number"] in existing or row["phone_number"] in seen:
+                    skipped += 1
+                    continue
+                seen.add(row["phone_number"])
+                new_rows.append(row)
+
+            passwords = [row["password"] for row in new_rows if row["password"]]
+            chunksize = max(1, len(passwords) // (options["workers"] * 4))
+            hashes = iter(pool.map(make_password, passwords, chunksize=chunksize))
+            users = [
+                CustomUser(
+                    # AbstractUser's username is still unique; mirror the
+                    # phone number so bulk inserts don't collide on "".
+                    username=row["phone_number"],
+                    phone_number=row["phone_number"],
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    password=next(hashes) if row["password"] else make_password(None),
+                )
+                for row in new_rows
+            ]
+            CustomUser.objects.bulk_create(users)
+            stats.add(len(users))
+        # bulk_create sends no post_save, so the user list would stay cached.
+        fragments.bump([CustomUser])
+
+        if invalid:
+            self.stdout.write(self.style.WARNING(f"Skipped {invalid} invalid rows."))
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {skipped} phone numbers already in use.")
+            )
+        self.stdout.write(self.style.SUCCESS(str(stats)))
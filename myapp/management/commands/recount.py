@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from myapp import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair the denormalized counters (Course.enrollment_count, "
+        "Department.teacher_count and Department.classroom_count)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted rows without fixing them.",
+        )
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            "--install-triggers",
+            action="store_true",
+            help="Maintain the counters with PostgreSQL triggers. Set "
+            "COUNTER_TRIGGERS = True as well so the signal handlers stop.",
+        )
+        group.add_argument("--drop-triggers", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["install_triggers"] or options["drop_triggers"]:
+            if connection.vendor != "postgresql":
+                raise CommandError("Counter triggers require PostgreSQL.")
+            if options["install_triggers"]:
+                counters.install_triggers()
+                self.stdout.write("Installed counter triggers.")
+            else:
+                counters.drop_triggers()
+                self.stdout.write("Dropped counter triggers.")
+
+        verb = "drifted" if options["dry_run"] else "fixed"
+        for counter, count in counters.recount(dry_run=options["dry_run"]).items():
+            self.stdout.write(f"{counter}: {count} rows {verb}")
+        self.stdout.write(self.style.SUCCESS("Counters checked."))
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from myapp import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs such as the admin's Delete All departments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of polling.",
+        )
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        while True:
+            failed = jobs.fail_stale()
+            if failed:
+                self.stderr.write(
+                    self.style.WARNING(f"Marked {failed} stale running jobs failed.")
+                )
+            job = jobs.claim_next()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running {job.kind} #{job.pk}")
+            jobs.run(job)
+            if job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(f"Finished {job.kind} #{job.pk}"))
+            else:
+                self.stderr.write(self.style.ERROR(f"{job.kind} #{job.pk} failed"))
+                self.stderr.write(job.error)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from myapp import rosters
+
+
+class Command(BaseCommand):
+    help = "Load course rosters and enrollment counts into the roster cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--courses",
+            type=int,
+            nargs="+",
+            help="Only warm these course ids (default: every course).",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Empty the cache first, e.g. after bulk imports or deletes.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            rosters.clear()
+        warmed = rosters.warm(options["courses"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Cached {warmed} course rosters"))
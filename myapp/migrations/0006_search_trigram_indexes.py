@@ -0,0 +1,129 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:53
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+import myapp.operations
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("myapp", "0005_job"),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        myapp.operations.AddPostgresIndex(
+            model_name="course",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="gin_trgm_ops",
+                ),
+                name="course_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="course",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("code"),
+                    name="gin_trgm_ops",
+                ),
+                name="course_code_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="customuser",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("phone_number"),
+                    name="gin_trgm_ops",
+                ),
+                name="customuser_phone_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="customuser",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("first_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="customuser_first_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="customuser",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("last_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="customuser_last_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="student",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("first_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="student_first_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="student",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("last_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="student_last_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="student",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("email"),
+                    name="gin_trgm_ops",
+                ),
+                name="student_email_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="teacher",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("first_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="teacher_first_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="teacher",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("last_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="teacher_last_name_trgm",
+            ),
+        ),
+        myapp.operations.AddPostgresIndex(
+            model_name="teacher",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("email"),
+                    name="gin_trgm_ops",
+                ),
+                name="teacher_email_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0006_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["-enrollment_date", "student", "-id"],
+                name="enrollment_date_student_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["course", "-enrollment_date", "student"],
+                name="enrollment_course_date_idx",
+            ),
+        ),
+        # Dropped after enrollment_course_date_idx exists, which covers it.
+        migrations.AlterField(
+            model_name="enrollment",
+            name="course",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="enrollments",
+                to="myapp.course",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, fk):
+    counts = (
+        model.objects.filter(**{fk: OuterRef("pk")})
+        .order_by()
+        .values(fk)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def backfill(apps, schema_editor):
+    Course = apps.get_model("myapp", "Course")
+    Department = apps.get_model("myapp", "Department")
+    Course.objects.update(
+        enrollment_count=count_of(apps.get_model("myapp", "Enrollment"), "course")
+    )
+    Department.objects.update(
+        teacher_count=count_of(apps.get_model("myapp", "Teacher"), "department"),
+        classroom_count=count_of(apps.get_model("myapp", "Classroom"), "department"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0007_enrollment_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="enrollment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="department",
+            name="classroom_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="department",
+            name="teacher_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
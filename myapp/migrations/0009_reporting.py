@@ -0,0 +1,130 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:05
+
+import django.db.models.deletion
+import myapp.operations
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentReport',
+            fields=[
+                ('department_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('teacher_count', models.IntegerField()),
+                ('course_count', models.IntegerField()),
+                ('student_count', models.IntegerField()),
+                ('enrollment_count', models.IntegerField()),
+                ('classroom_count', models.IntegerField()),
+                ('capacity', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'Department report',
+                'ordering': ['name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TeacherLoadReport',
+            fields=[
+                ('teacher_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=50)),
+                ('last_name', models.CharField(max_length=50)),
+                ('department_name', models.CharField(max_length=100, null=True)),
+                ('course_count', models.IntegerField()),
+                ('enrollment_count', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'Teacher load',
+                'verbose_name_plural': 'Teacher load',
+                'ordering': ['-enrollment_count', 'teacher_id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseMonthlyEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('enrollment_count', models.PositiveIntegerField()),
+                ('course', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='myapp.course')),
+            ],
+            options={
+                'verbose_name': 'Monthly course enrollments',
+                'verbose_name_plural': 'Monthly course enrollments',
+                'ordering': ['-month', 'course'],
+                'indexes': [models.Index(fields=['month'], name='myapp_cours_month_6e5266_idx')],
+                'unique_together': {('course', 'month')},
+            },
+        ),
+        myapp.operations.CreateReportView(
+            'myapp_departmentreport',
+            """
+            SELECT d.id AS department_id,
+                   d.name,
+                   COALESCE(t.teacher_count, 0) AS teacher_count,
+                   COALESCE(e.course_count, 0) AS course_count,
+                   COALESCE(e.student_count, 0) AS student_count,
+                   COALESCE(e.enrollment_count, 0) AS enrollment_count,
+                   COALESCE(r.classroom_count, 0) AS classroom_count,
+                   COALESCE(r.capacity, 0) AS capacity
+            FROM myapp_department d
+            LEFT JOIN (
+                SELECT department_id, COUNT(*) AS teacher_count
+                FROM myapp_teacher
+                GROUP BY department_id
+            ) t ON t.department_id = d.id
+            LEFT JOIN (
+                SELECT t.department_id,
+                       COUNT(DISTINCT c.id) AS course_count,
+                       COUNT(DISTINCT e.student_id) AS student_count,
+                       COUNT(e.id) AS enrollment_count
+                FROM myapp_course c
+                JOIN myapp_teacher t ON t.id = c.teacher_id
+                LEFT JOIN myapp_enrollment e ON e.course_id = c.id
+                GROUP BY t.department_id
+            ) e ON e.department_id = d.id
+            LEFT JOIN (
+                SELECT department_id,
+                       COUNT(*) AS classroom_count,
+                       SUM(capacity) AS capacity
+                FROM myapp_classroom
+                GROUP BY department_id
+            ) r ON r.department_id = d.id
+            """,
+            'department_id',
+        ),
+        myapp.operations.CreateReportView(
+            'myapp_teacherloadreport',
+            """
+            SELECT t.id AS teacher_id,
+                   t.first_name,
+                   t.last_name,
+                   d.name AS department_name,
+                   COUNT(DISTINCT c.id) AS course_count,
+                   COUNT(e.id) AS enrollment_count
+            FROM myapp_teacher t
+            LEFT JOIN myapp_department d ON d.id = t.department_id
+            LEFT JOIN myapp_course c ON c.teacher_id = t.id
+            LEFT JOIN myapp_enrollment e ON e.course_id = c.id
+            GROUP BY t.id, t.first_name, t.last_name, d.name
+            """,
+            'teacher_id',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_reporting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='large_classroom_capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Classrooms seating more than this count as large. Leave empty for the default of 50.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(condition=models.Q(('capacity__gt', 50)), fields=['capacity', 'department'], name='classroom_large_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:20
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def snapshot(apps, schema_editor):
+    """Log the existing rows so reading the feed from 0 returns all of them."""
+    Change = apps.get_model("myapp", "Change")
+    quote = schema_editor.quote_name
+    now = timezone.now()
+    for name, model_name in [
+        ("students", "Student"),
+        ("courses", "Course"),
+        ("enrollments", "Enrollment"),
+    ]:
+        source = quote(apps.get_model("myapp", model_name)._meta.db_table)
+        schema_editor.execute(
+            f"INSERT INTO {quote(Change._meta.db_table)} "
+            "(model, object_id, action, changed_at) "
+            f"SELECT %s, id, %s, %s FROM {source} ORDER BY id",
+            [name, "insert", now],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_large_classroom_threshold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete')], max_length=6)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['model', 'object_id', 'id'], name='change_object_idx')],
+            },
+        ),
+        migrations.RunPython(snapshot, migrations.RunPython.noop),
+    ]
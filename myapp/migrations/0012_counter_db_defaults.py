@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+COUNTERS = [
+    ('course', 'enrollment_count'),
+    ('department', 'classroom_count'),
+    ('department', 'teacher_count'),
+]
+
+
+def set_defaults(apps, schema_editor, default='0'):
+    # COPY imports leave the counters out. Only PostgreSQL needs the column
+    # default; SQLite would rebuild the tables under the 0009 report views.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    action = 'DROP DEFAULT' if default is None else f'SET DEFAULT {default}'
+    for model_name, field_name in COUNTERS:
+        model = apps.get_model('myapp', model_name)
+        column = model._meta.get_field(field_name).column
+        schema_editor.execute(
+            f'ALTER TABLE {quote(model._meta.db_table)} '
+            f'ALTER COLUMN {quote(column)} {action}'
+        )
+
+
+def drop_defaults(apps, schema_editor):
+    set_defaults(apps, schema_editor, default=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_change_log'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name=field_name,
+                    field=models.PositiveIntegerField(
+                        db_default=0, default=0, editable=False
+                    ),
+                )
+                for model_name, field_name in COUNTERS
+            ],
+            database_operations=[
+                migrations.RunPython(set_defaults, drop_defaults),
+            ],
+        ),
+    ]
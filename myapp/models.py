@@ -3,8 +3,24 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxLengthValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+PHONE_NUMBER_RE = re.compile(r"^\+92-\d{9}-\d{1}$")
+PHONE_NUMBER_MESSAGE = "Phone number must be in the format '+92-XXXXXXXXX-1'."
+EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+EMAIL_MESSAGE = "Invalid email format."
+COURSE_CODE_RE = re.compile(r"^[A-Z]{3}\d{3}$")
+COURSE_CODE_MESSAGE = "Course code must be in the format 'XXX123'."
+FUTURE_DATE_MESSAGE = "Enrollment date cannot be in the future."
+# Classrooms seating more than this are large unless their department sets
+# its own threshold. classroom_large_idx is a partial index on it.
+LARGE_CLASSROOM_CAPACITY = 50
+# The admin's icontains searches on users, teachers, students and courses are
+# backed by trigram GIN indexes that migration 0006 creates on PostgreSQL
+# only. They are not in Meta.indexes: other backends cannot build them, and
+# SQLite recreates every index in the model state when it rebuilds a table.
+
 
 class PhoneNumberField(models.CharField):
     def __init__(self, *args, **kwargs):
@@ -13,11 +29,8 @@ class PhoneNumberField(models.CharField):
 
     def validate(self, value, model_instance):
         super().validate(value, model_instance)
-        pattern = r"^\+92-\d{9}-\d{1}$"
-        if not re.match(pattern, value):
-            raise ValidationError(
-                "Phone number must be in the format '+92-XXXXXXXXX-1'."
-            )
+        if not PHONE_NUMBER_RE.match(value):
+            raise ValidationError(PHONE_NUMBER_MESSAGE)
 
 
 class CustomUserManager(BaseUserManager):
@@ -74,6 +87,19 @@ class Department(models.Model):
         null=True,
         blank=True,
     )
+    large_classroom_capacity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Classrooms seating more than this count as large. "
+        f"Leave empty for the default of {LARGE_CLASSROOM_CAPACITY}.",
+    )
+    # Maintained by myapp.counters.
+    teacher_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
+    classroom_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
 
     def __str__(self):
         return self.name
@@ -96,8 +122,8 @@ class Teacher(models.Model):
     )
 
     def clean(self):
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", self.email):
-            raise ValidationError("Invalid email format.")
+        if not EMAIL_RE.match(self.email):
+            raise ValidationError(EMAIL_MESSAGE)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -111,7 +137,7 @@ class Student(models.Model):
 
     def clean(self):
         if self.enrollment_date > timezone.now().date():
-            raise ValidationError("Enrollment date cannot be in the future.")
+            raise ValidationError(FUTURE_DATE_MESSAGE)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -129,15 +155,72 @@ class Course(models.Model):
         related_name="courses",
         blank=True,
     )
+    # Maintained by myapp.counters.
+    enrollment_count = models.PositiveIntegerField(
+        default=0, db_default=0, editable=False
+    )
 
     def clean(self):
-        if not re.match(r"^[A-Z]{3}\d{3}$", self.code):
-            raise ValidationError("Course code must be in the format 'XXX123'.")
+        if not COURSE_CODE_RE.match(self.code):
+            raise ValidationError(COURSE_CODE_MESSAGE)
 
     def __str__(self):
         return self.name
 
 
+def large_classroom_floor(using=None):
+    """The lowest large-classroom threshold in use: the default unless a
+    department sets a lower one."""
+    floor = Department.objects.using(using).aggregate(
+        floor=models.Min("large_classroom_capacity")
+    )["floor"]
+    if floor is None or floor > LARGE_CLASSROOM_CAPACITY:
+        return LARGE_CLASSROOM_CAPACITY
+    return floor
+
+
+class ClassroomQuerySet(models.QuerySet):
+    def with_large_threshold(self):
+        return self.annotate(
+            large_threshold=Coalesce(
+                "department__large_classroom_capacity",
+                models.Value(LARGE_CLASSROOM_CAPACITY),
+            )
+        )
+
+    def large(self, floor=None):
+        """Classrooms above their department's (or the default) threshold.
+
+        ``floor`` is large_classroom_floor(), looked up here once when not
+        given. The constant lower bound lets PostgreSQL and SQLite use the
+        ``capacity > 50`` partial index whenever no department sets a
+        lower threshold.
+        """
+        if floor is None:
+            floor = large_classroom_floor(self.db)
+        return (
+            self.filter(capacity__gt=floor)
+            .with_large_threshold()
+            .filter(capacity__gt=models.F("large_threshold"))
+        )
+
+    def capacity_histogram(self, bucket_size=10):
+        """Return ``[(low, high, count), ...]`` counted in a single query.
+
+        Buckets are ``bucket_size`` seats wide; empty buckets are left out.
+        """
+        bucket = models.F("capacity") / bucket_size * bucket_size
+        rows = (
+            self.order_by()
+            .annotate(bucket=bucket)
+            .values("bucket")
+            .annotate(count=models.Count("pk"))
+            .order_by("bucket")
+            .values_list("bucket", "count")
+        )
+        return [(low, low + bucket_size - 1, count) for low, count in rows]
+
+
 class Classroom(models.Model):
     room_number = models.CharField(
         max_length=10, unique=True, validators=[MaxLengthValidator(10)]
@@ -151,32 +234,71 @@ class Classroom(models.Model):
         blank=True,
     )
 
+    objects = ClassroomQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["capacity", "department"],
+                condition=models.Q(capacity__gt=LARGE_CLASSROOM_CAPACITY),
+                name="classroom_large_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.room_number
 
 
+class LargeClassroomManager(models.Manager.from_queryset(ClassroomQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().large()
+
+
 class LargeClassroom(Classroom):
+    objects = LargeClassroomManager()
+
     class Meta:
         proxy = True
         verbose_name = "Large Classroom"
         verbose_name_plural = "Large Classrooms"
 
     def is_large(self):
-        return self.capacity > 50
+        # Rows loaded through the manager carry their threshold already.
+        threshold = getattr(self, "large_threshold", None)
+        if threshold is None and self.department is not None:
+            threshold = self.department.large_classroom_capacity
+        if threshold is None:
+            threshold = LARGE_CLASSROOM_CAPACITY
+        return self.capacity > threshold
 
 
 class Enrollment(models.Model):
     student = models.ForeignKey(
         Student, on_delete=models.CASCADE, related_name="enrollments"
     )
+    # Per-course lookups are served by the leading column of
+    # enrollment_course_date_idx, so the FK does not need its own index.
     course = models.ForeignKey(
-        Course, on_delete=models.CASCADE, related_name="enrollments"
+        Course, on_delete=models.CASCADE, related_name="enrollments", db_index=False
     )
     enrollment_date = models.DateField()
 
     class Meta:
         unique_together = ("student", "course")
         ordering = ["-enrollment_date", "student"]
+        indexes = [
+            # Matches the default ordering plus the "-pk" tie-breaker the admin
+            # appends, so unfiltered listings read the index instead of sorting.
+            models.Index(
+                fields=["-enrollment_date", "student", "-id"],
+                name="enrollment_date_student_idx",
+            ),
+            # Per-course rosters in default order.
+            models.Index(
+                fields=["course", "-enrollment_date", "student"],
+                name="enrollment_course_date_idx",
+            ),
+        ]
         verbose_name = "Enrollment"
         verbose_name_plural = "Enrollments"
 
@@ -185,4 +307,149 @@ class Enrollment(models.Model):
 
     def clean(self):
         if self.enrollment_date > timezone.now().date():
-            raise ValidationError("Enrollment date cannot be in the future.")
+            raise ValidationError(FUTURE_DATE_MESSAGE)
+
+
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched by the worker while the job runs; see myapp.jobs.fail_stale().
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in (self.PENDING, self.RUNNING)
+
+
+# Reporting summaries, rebuilt by myapp.reports (see refresh_reports).
+
+
+class ReportRefresh(models.Model):
+    """When a report was last refreshed and how far its data goes."""
+
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CourseMonthlyEnrollment(models.Model):
+    # No database constraint or reverse relation: the summary is rebuilt from
+    # Enrollment and must not get in the way of deleting courses.
+    course = models.ForeignKey(
+        Course, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    month = models.DateField()
+    enrollment_count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("course", "month")
+        indexes = [models.Index(fields=["month"])]
+        ordering = ["-month", "course"]
+        verbose_name = "Monthly course enrollments"
+        verbose_name_plural = "Monthly course enrollments"
+
+    def __str__(self):
+        return f"{self.course_id} {self.month:%Y-%m}"
+
+
+class DepartmentReport(models.Model):
+    """Materialized view (plain view off PostgreSQL) created in migrations."""
+
+    department_id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    teacher_count = models.IntegerField()
+    course_count = models.IntegerField()
+    student_count = models.IntegerField()
+    enrollment_count = models.IntegerField()
+    classroom_count = models.IntegerField()
+    capacity = models.IntegerField()
+
+    class Meta:
+        managed = False
+        ordering = ["name"]
+        verbose_name = "Department report"
+
+    def __str__(self):
+        return self.name
+
+    def utilization(self):
+        """Enrolled students per classroom seat."""
+        if not self.capacity:
+            return None
+        return round(self.student_count / self.capacity, 2)
+
+
+class TeacherLoadReport(models.Model):
+    """Materialized view (plain view off PostgreSQL) created in migrations."""
+
+    teacher_id = models.BigIntegerField(primary_key=True)
+    first_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50)
+    department_name = models.CharField(max_length=100, null=True)
+    course_count = models.IntegerField()
+    enrollment_count = models.IntegerField()
+
+    class Meta:
+        managed = False
+        ordering = ["-enrollment_count", "teacher_id"]
+        verbose_name = "Teacher load"
+        verbose_name_plural = "Teacher load"
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name}"
+
+
+class Change(models.Model):
+    """An entry in the change feed of students, courses and enrollments.
+
+    Appended by myapp.changes; ``id`` is the feed's sequence number.
+    """
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTION_CHOICES = [(INSERT, "Insert"), (UPDATE, "Update"), (DELETE, "Delete")]
+
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # Finds the newer entries for the same row when compacting.
+            models.Index(
+                fields=["model", "object_id", "id"], name="change_object_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.model} {self.object_id}"
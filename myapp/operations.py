@@ -0,0 +1,68 @@
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+
+class AddPostgresIndex(AddIndex):
+    """AddIndex that only exists in the database, and only on PostgreSQL.
+
+    Used for index types other backends cannot build (GIN, trigram operator
+    classes). The index is left out of the migration state, and so out of
+    the model's Meta: otherwise SQLite would try to recreate it whenever a
+    later migration rebuilds the table.
+    """
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class CreateReportView(Operation):
+    """Create a reporting view over ``sql``.
+
+    On PostgreSQL it is a materialized view with a unique index on
+    ``unique``, which REFRESH MATERIALIZED VIEW CONCURRENTLY requires. Other
+    backends get a plain view, which is always current. Pair it with a
+    ``managed = False`` model.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, name, sql, unique):
+        self.name = name
+        self.sql = sql
+        self.unique = unique
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.name, self.sql, self.unique], {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        name = schema_editor.quote_name(self.name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(f"CREATE MATERIALIZED VIEW {name} AS {self.sql}")
+            schema_editor.execute(
+                f"CREATE UNIQUE INDEX {schema_editor.quote_name(self.name + '_uniq')} "
+                f"ON {name} ({schema_editor.quote_name(self.unique)})"
+            )
+        else:
+            schema_editor.execute(f"CREATE VIEW {name} AS {self.sql}")
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        name = schema_editor.quote_name(self.name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
+        else:
+            schema_editor.execute(f"DROP VIEW IF EXISTS {name}")
+
+    def describe(self):
+        return f"Create report view {self.name}"
@@ -0,0 +1,102 @@
+import base64
+import json
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+
+# Tables estimated to hold more rows than this report pg_class.reltuples
+# instead of running COUNT(*).
+ESTIMATE_THRESHOLD = 100_000
+
+
+def estimated_count(model):
+    """Return PostgreSQL's planner estimate of ``model``'s row count, or None."""
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that have never been analyzed.
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = estimated_count(self.object_list.model)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        return super().count
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def keyset_columns(model, ordering):
+    """Map change list ordering to ``(attname, field, descending)`` triples.
+
+    Returns None when a seek predicate cannot reproduce the ordering: for
+    expressions, lookups across relations, nullable columns or foreign keys
+    whose model has its own default ordering.
+    """
+    opts = model._meta
+    columns = []
+    for name in ordering:
+        if not isinstance(name, str):
+            return None
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        if name == "pk":
+            name = opts.pk.name
+        if "__" in name:
+            return None
+        try:
+            field = opts.get_field(name)
+        except Exception:
+            return None
+        if not field.concrete or field.null:
+            return None
+        if field.is_relation and field.related_model._meta.ordering:
+            return None
+        columns.append((field.attname, field, descending))
+    if not any(field.primary_key or field.unique for _, field, _ in columns):
+        return None
+    return columns
+
+
+def seek(queryset, columns, values, forward):
+    """Filter ``queryset`` to the rows after (or before) the row at ``values``.
+
+    The OR of the per-column comparisons is ANDed with a bound on the
+    leading column alone, which is what lets the database start the index
+    scan at the row instead of walking the index from its first entry.
+    """
+    condition = Q()
+    for i, (attname, _, descending) in enumerate(columns):
+        lookup = "lt" if descending == forward else "gt"
+        equal = {columns[j][0]: values[j] for j in range(i)}
+        condition |= Q(**equal, **{f"{attname}__{lookup}": values[i]})
+    attname, _, descending = columns[0]
+    bound = "lte" if descending == forward else "gte"
+    return queryset.filter(Q(**{f"{attname}__{bound}": values[0]}), condition)
@@ -0,0 +1,179 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+DEFAULT_BUFFER_SIZE = 500
+# Fingerprints run at least this many times in one request or command are
+# reported as duplicates, usually an N+1 pattern.
+DUPLICATE_THRESHOLD = 2
+REPORTED_DUPLICATES = 10
+
+IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+NUMBER_RE = re.compile(r"\b\d+\b")
+
+_records = deque(maxlen=getattr(settings, "PROFILING_BUFFER_SIZE", DEFAULT_BUFFER_SIZE))
+_lock = threading.Lock()
+
+
+def sample_rate():
+    return getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+
+
+def fingerprint(sql):
+    """Collapse ``IN (%s, ...)`` lists and inlined numbers (LIMIT/OFFSET)."""
+    return NUMBER_RE.sub("N", IN_LIST_RE.sub("(...)", sql))
+
+
+class QueryRecorder:
+    """Database execute wrapper counting queries, time and fingerprints."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.fingerprints.most_common(REPORTED_DUPLICATES)
+            if count >= DUPLICATE_THRESHOLD
+        ]
+
+
+@contextmanager
+def profile(kind, name):
+    """Record queries and wall time of the block into the ring buffer.
+
+    Yields the record so callers can add details such as a status code.
+    """
+    recorder = QueryRecorder()
+    record = {"kind": kind, "name": name, "started_at": timezone.now()}
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        try:
+            yield record
+        finally:
+            record.update(
+                wall_ms=round((time.perf_counter() - started) * 1000, 3),
+                queries=recorder.count,
+                db_ms=round(recorder.seconds * 1000, 3),
+                duplicates=recorder.duplicates(),
+            )
+            store(record)
+
+
+def store(record):
+    with _lock:
+        _records.append(record)
+    log = getattr(settings, "PROFILING_LOG", None)
+    if log:
+        with _lock, open(log, "a") as out:
+            out.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+def summarize(rows):
+    """Per view/command totals: ``[{name, runs, avg/max queries, ...}]``."""
+    groups = {}
+    for record in rows:
+        groups.setdefault((record["kind"], record["name"]), []).append(record)
+    summary = []
+    for (kind, name), group in groups.items():
+        runs = len(group)
+        summary.append(
+            {
+                "kind": kind,
+                "name": name,
+                "runs": runs,
+                "avg_queries": round(sum(r["queries"] for r in group) / runs, 1),
+                "max_queries": max(r["queries"] for r in group),
+                "avg_db_ms": round(sum(r["db_ms"] for r in group) / runs, 3),
+                "avg_wall_ms": round(sum(r["wall_ms"] for r in group) / runs, 3),
+                "duplicates": max(len(r["duplicates"]) for r in group),
+            }
+        )
+    summary.sort(key=lambda row: row["avg_db_ms"], reverse=True)
+    return summary
+
+
+class ProfilingMiddleware:
+    """Profile a PROFILING_SAMPLE_RATE fraction of requests.
+
+    Removed from the stack at startup when the rate is 0. Queries run while
+    a streaming response is consumed happen after the middleware returns
+    and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.rate = sample_rate()
+        if not self.rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        with profile("request", request.path) as record:
+            response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None:
+                record["name"] = match.view_name or match._func_path
+            record["path"] = request.path
+            record["method"] = request.method
+            record["status"] = response.status_code
+        return response
+
+
+def profile_command(handle):
+    """Profile a management command's ``handle()`` when sampling is on.
+
+    The summary goes to stderr; set PROFILING_LOG to keep the record, since
+    the command's process and its ring buffer end with it.
+    """
+
+    @wraps(handle)
+    def wrapper(self, *args, **options):
+        if not sample_rate():
+            return handle(self, *args, **options)
+        name = self.__module__.rsplit(".", 1)[-1]
+        with profile("command", name) as record:
+            result = handle(self, *args, **options)
+        self.stderr.write(
+            f"{name}: {record['queries']} queries, {record['db_ms']:.0f} ms in "
+            f"the database, {record['wall_ms']:.0f} ms total"
+        )
+        for duplicate in record["duplicates"]:
+            self.stderr.write(f"  {duplicate['count']}x {duplicate['sql'][:200]}")
+        return result
+
+    return wrapper
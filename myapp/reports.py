@@ -0,0 +1,86 @@
+import time
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .bulk import batched
+from .models import (
+    CourseMonthlyEnrollment,
+    DepartmentReport,
+    Enrollment,
+    ReportRefresh,
+    TeacherLoadReport,
+)
+
+MONTHLY = "course_monthly_enrollments"
+VIEWS = [DepartmentReport, TeacherLoadReport]
+BATCH_SIZE = 5000
+
+
+def refresh_monthly(full=False, since=None):
+    """Rebuild the monthly course enrollment summary from the watermark on.
+
+    The watermark is the latest ``enrollment_date`` seen by the previous
+    refresh. Months from the watermark's month onwards are recounted, so
+    new enrollments dated in that month or later are picked up. Deletions
+    and backdated enrollments before it need ``since`` or ``full``.
+    Returns the number of summary rows written.
+    """
+    state, _ = ReportRefresh.objects.get_or_create(name=MONTHLY)
+    started = time.perf_counter()
+    if since is None and not full and state.watermark is not None:
+        since = state.watermark
+    enrollments = Enrollment.objects.order_by()
+    summary = CourseMonthlyEnrollment.objects.all()
+    if since is not None:
+        since = since.replace(day=1)
+        enrollments = enrollments.filter(enrollment_date__gte=since)
+        summary = summary.filter(month__gte=since)
+    rows = (
+        enrollments.annotate(month=TruncMonth("enrollment_date"))
+        .values("course_id", "month")
+        .annotate(count=Count("pk"))
+        .values_list("course_id", "month", "count")
+    )
+
+    written = 0
+    with transaction.atomic():
+        watermark = enrollments.aggregate(latest=Max("enrollment_date"))["latest"]
+        summary.delete()
+        objs = (
+            CourseMonthlyEnrollment(
+                course_id=course_id, month=month, enrollment_count=count
+            )
+            for course_id, month, count in rows.iterator()
+        )
+        for batch in batched(objs, BATCH_SIZE):
+            CourseMonthlyEnrollment.objects.bulk_create(batch)
+            written += len(batch)
+        state.watermark = watermark or state.watermark
+        state.refreshed_at = timezone.now()
+        state.duration = time.perf_counter() - started
+        state.save()
+    return written
+
+
+def refresh_views(concurrently=True):
+    """Refresh the materialized report views; a no-op off PostgreSQL.
+
+    CONCURRENTLY keeps the views readable while they are rebuilt, at the
+    cost of a slower refresh.
+    """
+    if connection.vendor != "postgresql":
+        return
+    option = "CONCURRENTLY " if concurrently else ""
+    for model in VIEWS:
+        started = time.perf_counter()
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {option}{table}")
+        ReportRefresh.objects.update_or_create(
+            name=model._meta.db_table,
+            defaults={
+                "refreshed_at": timezone.now(),
+                "duration": time.perf_counter() - started,
+            },
+        )
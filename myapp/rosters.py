@@ -0,0 +1,174 @@
+from collections import Counter
+from itertools import groupby
+from django.core.cache import caches
+from django.db.models import Count
+from .bulk import batched
+from .models import Course, Enrollment
+
+CACHE_ALIAS = "rosters"
+# Larger rosters are always read from the database rather than cached whole.
+MAX_CACHED_ROSTER = 5000
+ROSTER_FIELDS = [
+    "id",
+    "student_id",
+    "student__first_name",
+    "student__last_name",
+    "student__email",
+    "enrollment_date",
+]
+# Hit/miss counters for this process, exposed by /api/cache/stats/.
+stats = Counter()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def roster_key(course_id):
+    return f"roster:{course_id}"
+
+
+def course_count_key(course_id):
+    return f"course-enrollments:{course_id}"
+
+
+def department_count_key(department_id):
+    # Department counts depend on which teacher runs each course and which
+    # department each teacher is in, so they are versioned as a group and
+    # dropped together by bumping the generation.
+    generation = get_cache().get_or_set("department-generation", 1, timeout=None)
+    return f"department-enrollments:{generation}:{department_id}"
+
+
+def cached(kind, key, compute):
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        stats[f"{kind}_misses"] += 1
+        value = compute()
+        cache.set(key, value)
+    else:
+        stats[f"{kind}_hits"] += 1
+    return value
+
+
+def roster_rows(queryset):
+    return [
+        {
+            "id": row["id"],
+            "student_id": row["student_id"],
+            "first_name": row["student__first_name"],
+            "last_name": row["student__last_name"],
+            "email": row["student__email"],
+            "enrollment_date": row["enrollment_date"],
+        }
+        for row in queryset
+    ]
+
+
+def course_roster(course_id):
+    """Enrollments of a course with their students' names, ordered by id.
+
+    Returns None for courses with more than MAX_CACHED_ROSTER enrollments;
+    read those from the database a page at a time.
+    """
+
+    def compute():
+        queryset = Enrollment.objects.filter(course_id=course_id).order_by("pk")
+        rows = roster_rows(queryset.values(*ROSTER_FIELDS)[: MAX_CACHED_ROSTER + 1])
+        # False marks the roster as too large so it isn't recomputed each time.
+        return rows if len(rows) <= MAX_CACHED_ROSTER else False
+
+    rows = cached("roster", roster_key(course_id), compute)
+    return None if rows is False else rows
+
+
+def course_enrollment_count(course_id):
+    return cached(
+        "course_count",
+        course_count_key(course_id),
+        lambda: Enrollment.objects.filter(course_id=course_id).count(),
+    )
+
+
+def department_enrollment_count(department_id):
+    return cached(
+        "department_count",
+        department_count_key(department_id),
+        lambda: Enrollment.objects.filter(
+            course__teacher__department_id=department_id
+        ).count(),
+    )
+
+
+def invalidate_courses(course_ids):
+    keys = []
+    for course_id in course_ids:
+        keys += [roster_key(course_id), course_count_key(course_id)]
+    if keys:
+        get_cache().delete_many(keys)
+
+
+def invalidate_students(student_ids):
+    """Drop the rosters listing any of ``student_ids``, which show their names."""
+    invalidate_courses(
+        Enrollment.objects.filter(student_id__in=student_ids)
+        .values_list("course_id", flat=True)
+        .distinct()
+    )
+
+
+def invalidate_departments():
+    cache = get_cache()
+    try:
+        cache.incr("department-generation")
+    except ValueError:
+        cache.set("department-generation", 2, timeout=None)
+
+
+def clear():
+    get_cache().clear()
+
+
+def warm(course_ids=None, batch_size=500):
+    """Load rosters and counts for ``course_ids`` (default: every course).
+
+    Reads the enrollments of ``batch_size`` courses per query instead of
+    one query per course. Returns the number of courses cached.
+    """
+    cache = get_cache()
+    if course_ids is None:
+        course_ids = (
+            Course.objects.order_by("pk").values_list("pk", flat=True).iterator()
+        )
+    warmed = 0
+    for batch in batched(course_ids, batch_size):
+        values = {}
+        for course_id in batch:
+            values[roster_key(course_id)] = []
+            values[course_count_key(course_id)] = 0
+        rows = (
+            Enrollment.objects.filter(course_id__in=batch)
+            .order_by("course_id", "pk")
+            .values("course_id", *ROSTER_FIELDS)
+        )
+        by_course = groupby(rows.iterator(), key=lambda row: row["course_id"])
+        for course_id, group in by_course:
+            roster = roster_rows(group)
+            values[course_count_key(course_id)] = len(roster)
+            if len(roster) > MAX_CACHED_ROSTER:
+                roster = False
+            values[roster_key(course_id)] = roster
+        cache.set_many(values)
+        warmed += len(batch)
+
+    counts = (
+        Enrollment.objects.filter(course__teacher__department__isnull=False)
+        .values_list("course__teacher__department_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    cache.set_many(
+        {department_count_key(pk): count for pk, count in counts.iterator()}
+    )
+    return warmed
@@ -0,0 +1,212 @@
+from bisect import bisect_left, insort
+from .models import Classroom, Course
+
+# Weekly time slots per room: five days of five periods.
+DEFAULT_SLOTS = 25
+# Extra cost, in wasted seats, of putting a course in another department's
+# room when solving with min-cost matching.
+DEPARTMENT_PENALTY = 100
+# Largest cost matrix (courses x room slots) the matching solver accepts;
+# its running time grows with courses squared times room slots.
+MATCHING_LIMIT = 250_000
+INFEASIBLE = 10**9
+
+
+class Schedule:
+    """The result of scheduling: ``assignments`` and ``unassigned`` courses.
+
+    ``assignments`` holds ``(course_id, room_id, slot)`` tuples.
+    """
+
+    def __init__(self, courses, rooms):
+        self.courses = {course[0]: course for course in courses}
+        self.rooms = {room[0]: room for room in rooms}
+        self.assignments = []
+        self.unassigned = []
+
+    def assign(self, course_id, room_id, slot):
+        self.assignments.append((course_id, room_id, slot))
+
+    def summary(self):
+        wasted = 0
+        other_department = 0
+        for course_id, room_id, _ in self.assignments:
+            _, size, course_department = self.courses[course_id]
+            _, capacity, room_department = self.rooms[room_id]
+            wasted += capacity - size
+            if course_department != room_department:
+                other_department += 1
+        return {
+            "assigned": len(self.assignments),
+            "unassigned": len(self.unassigned),
+            "wasted_seats": wasted,
+            "other_department": other_department,
+        }
+
+
+class RoomIndex:
+    """Rooms with free slots, sorted by capacity for best-fit lookups."""
+
+    def __init__(self):
+        self.keys = []
+
+    def add(self, room):
+        insort(self.keys, (room[1], room[0]))
+
+    def remove(self, room):
+        key = (room[1], room[0])
+        del self.keys[bisect_left(self.keys, key)]
+
+    def best_fit(self, size):
+        """Return the id of the smallest room seating ``size``, or None."""
+        i = bisect_left(self.keys, (size,))
+        return self.keys[i][1] if i < len(self.keys) else None
+
+
+def schedule_greedy(courses, rooms, slots=DEFAULT_SLOTS, prefer_department=True):
+    """Assign courses to room slots, largest course first, best fit.
+
+    ``courses`` are ``(course_id, size, department_id)`` and ``rooms``
+    ``(room_id, capacity, department_id)`` tuples. Each course gets the
+    smallest room that seats it (one in its own department if
+    ``prefer_department`` and there is one), in that room's next free slot.
+    Runs in O(n log m) lookups plus an O(m) removal per filled room.
+    """
+    result = Schedule(courses, rooms)
+    everywhere = RoomIndex()
+    by_department = {}
+    for room in rooms:
+        everywhere.add(room)
+        by_department.setdefault(room[2], RoomIndex()).add(room)
+    used = dict.fromkeys(result.rooms, 0)
+
+    for course_id, size, department_id in sorted(
+        courses, key=lambda course: course[1], reverse=True
+    ):
+        room_id = None
+        if prefer_department and department_id in by_department:
+            room_id = by_department[department_id].best_fit(size)
+        if room_id is None:
+            room_id = everywhere.best_fit(size)
+        if room_id is None:
+            result.unassigned.append(course_id)
+            continue
+        result.assign(course_id, room_id, used[room_id])
+        used[room_id] += 1
+        if used[room_id] == slots:
+            room = result.rooms[room_id]
+            everywhere.remove(room)
+            by_department[room[2]].remove(room)
+    return result
+
+
+def min_cost_assignment(cost):
+    """Hungarian algorithm: the column for each row minimizing total cost.
+
+    ``cost`` is a list of rows with at least as many columns as rows.
+    """
+    n, m = len(cost), len(cost[0])
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    owner = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [INFEASIBLE * 2] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            delta = INFEASIBLE * 2
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    current = row[j - 1] - u[i0] - v[j]
+                    if current < minv[j]:
+                        minv[j] = current
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    columns = [None] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            columns[owner[j] - 1] = j - 1
+    return columns
+
+
+def schedule_matching(
+    courses, rooms, slots=DEFAULT_SLOTS, department_penalty=DEPARTMENT_PENALTY
+):
+    """Optimal assignment minimizing wasted seats plus department penalties.
+
+    Exact but slow; meant for one department or a few hundred courses.
+    """
+    bins = [
+        (room, slot) for room in rooms for slot in range(min(slots, len(courses)))
+    ]
+    columns = max(len(bins), len(courses))
+    if len(courses) * columns > MATCHING_LIMIT:
+        raise ValueError(
+            f"{len(courses)} courses x {len(bins)} room slots is too large to "
+            "match exactly; use the greedy method or fewer courses."
+        )
+    result = Schedule(courses, rooms)
+    if not courses:
+        return result
+    cost = []
+    for _, size, department_id in courses:
+        row = []
+        for (_, capacity, room_department), _ in bins:
+            if capacity < size:
+                row.append(INFEASIBLE)
+            elif room_department != department_id:
+                row.append(capacity - size + department_penalty)
+            else:
+                row.append(capacity - size)
+        # Dummy columns so every course can be left unassigned.
+        row.extend([INFEASIBLE] * (columns - len(bins)))
+        cost.append(row)
+
+    for course, row, column in zip(courses, cost, min_cost_assignment(cost)):
+        if row[column] >= INFEASIBLE:
+            result.unassigned.append(course[0])
+        else:
+            room, slot = bins[column]
+            result.assign(course[0], room[0], slot)
+    return result
+
+
+METHODS = {"greedy": schedule_greedy, "matching": schedule_matching}
+
+
+def load_courses(department_id=None):
+    """Courses as ``(id, enrollment_count, teacher's department id)``."""
+    queryset = Course.objects.order_by()
+    if department_id is not None:
+        queryset = queryset.filter(teacher__department_id=department_id)
+    return list(
+        queryset.values_list("pk", "enrollment_count", "teacher__department_id")
+    )
+
+
+def load_rooms(department_id=None):
+    queryset = Classroom.objects.order_by()
+    if department_id is not None:
+        queryset = queryset.filter(department_id=department_id)
+    return list(queryset.values_list("pk", "capacity", "department_id"))
@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from . import auth, rosters
+from .models import Course, CustomUser, Enrollment, Student, Teacher
+
+# Bulk operations (bulk_create, queryset.update(), COPY imports and the
+# chunked deletes in myapp.bulk) do not send these signals; run
+# `warm_rosters --clear` after them. The admin's bulk actions drop the
+# rosters they touch themselves (BulkActionMixin.bulk_updated). The commands
+# and jobs doing them call fragments.bump() themselves; fragments.connect()
+# wires up the rest.
+
+
+@receiver(pre_save, sender=Enrollment)
+def enrollment_saving(sender, instance, update_fields=None, **kwargs):
+    # An enrollment moved to another course leaves the old one stale too.
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and "course" not in update_fields:
+        return
+    instance._roster_previous_course = (
+        sender._base_manager.filter(pk=instance.pk)
+        .values_list("course_id", flat=True)
+        .first()
+    )
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    previous = instance.__dict__.pop("_roster_previous_course", None)
+    rosters.invalidate_courses({instance.course_id, previous} - {None})
+    rosters.invalidate_departments()
+
+
+@receiver([post_save, post_delete], sender=Student)
+def student_changed(sender, instance, **kwargs):
+    # Deleting a student cascades to its enrollments, which invalidate their
+    # own courses; a saved student may appear on any roster they are on.
+    if kwargs["signal"] is post_save:
+        rosters.invalidate_students([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    rosters.invalidate_courses([instance.pk])
+    rosters.invalidate_departments()
+
+
+@receiver([post_save, post_delete], sender=Teacher)
+def teacher_changed(sender, instance, **kwargs):
+    rosters.invalidate_departments()
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    auth.invalidate_user(instance)
+
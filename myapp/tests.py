@@ -1,3 +1,984 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+from asgiref.sync import async_to_sync
+from django.contrib import admin
+from django.contrib.admin.utils import quote
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models.deletion import Collector
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse, set_script_prefix
+from django.utils import timezone
+from . import (
+    auth,
+    counters,
+    fragments,
+    jobs,
+    profiling,
+    reports,
+    rosters,
+    scheduling,
+)
+from .auth import CachedModelBackend
+from .benchmarks import keyset_page
+from .bulk import delete_rows
+from .models import (
+    Change,
+    Classroom,
+    Course,
+    CourseMonthlyEnrollment,
+    CustomUser,
+    Department,
+    Enrollment,
+    Job,
+    LargeClassroom,
+    ReportRefresh,
+    Student,
+    Teacher,
+)
+from .pagination import keyset_columns, seek
+from .validation import BatchValidator
+from .views import MAX_LIMIT
 
-# Create your tests here.
+
+def search_plan(model, term):
+    """EXPLAIN output of the admin's search for ``term`` on ``model``."""
+    model_admin = admin.site._registry[model]
+    queryset, _ = model_admin.get_search_results(
+        RequestFactory().get("/"), model._default_manager.all(), term
+    )
+    with connection.cursor() as cursor:
+        # The test tables are tiny; make the planner show what it can use.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@skipUnless(connection.vendor == "postgresql", "Trigram indexes are PostgreSQL-only.")
+class TrigramIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = Teacher.objects.create(
+            first_name="Ada", last_name="Lovelace", email="ada@example.com"
+        )
+        Course.objects.create(name="Analysis", code="ANA101", teacher=teacher)
+        Student.objects.create(
+            first_name="Alan",
+            last_name="Turing",
+            email="alan@example.com",
+            enrollment_date=date(2024, 1, 1),
+        )
+        CustomUser.objects.create_user("+92-123456789-1", first_name="Grace")
+
+    def assertSearchUses(self, model, indexes):
+        plan = search_plan(model, "ali")
+        for index in indexes:
+            self.assertIn(index, plan)
+
+    def test_student_search(self):
+        self.assertSearchUses(
+            Student,
+            ["student_first_name_trgm", "student_last_name_trgm", "student_email_trgm"],
+        )
+
+    def test_teacher_search(self):
+        self.assertSearchUses(
+            Teacher,
+            ["teacher_first_name_trgm", "teacher_last_name_trgm", "teacher_email_trgm"],
+        )
+
+    def test_course_search(self):
+        self.assertSearchUses(Course, ["course_name_trgm", "course_code_trgm"])
+
+    def test_user_search(self):
+        self.assertSearchUses(
+            CustomUser,
+            [
+                "customuser_phone_trgm",
+                "customuser_first_name_trgm",
+                "customuser_last_name_trgm",
+            ],
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY imports are PostgreSQL-only.")
+class CounterColumnTests(TestCase):
+    def test_inserts_may_leave_out_counters(self):
+        # COPY imports (transfer.Importer) only list the file's columns.
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(Course._meta.db_table)} (name, code) "
+                "VALUES ('Algebra', 'ALG101')"
+            )
+            cursor.execute(
+                f"INSERT INTO {quote(Department._meta.db_table)} (name) "
+                "VALUES ('Mathematics')"
+            )
+        self.assertEqual(Course.objects.get(code="ALG101").enrollment_count, 0)
+        department = Department.objects.get(name="Mathematics")
+        self.assertEqual(department.teacher_count, 0)
+        self.assertEqual(department.classroom_count, 0)
+
+
+class CounterSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mathematics = Department.objects.create(name="Mathematics")
+        cls.physics = Department.objects.create(name="Physics")
+
+    def assertCounts(self, mathematics, physics):
+        self.mathematics.refresh_from_db()
+        self.physics.refresh_from_db()
+        self.assertEqual(
+            (self.mathematics.teacher_count, self.physics.teacher_count),
+            (mathematics, physics),
+        )
+
+    def test_create_move_and_delete(self):
+        teacher = Teacher.objects.create(
+            first_name="Ada",
+            last_name="Lovelace",
+            email="ada@example.com",
+            department=self.mathematics,
+        )
+        self.assertCounts(1, 0)
+        teacher.department = self.physics
+        teacher.save()
+        self.assertCounts(0, 1)
+        teacher.save(update_fields=["first_name"])
+        self.assertCounts(0, 1)
+        teacher.department = None
+        teacher.save()
+        self.assertCounts(0, 0)
+        teacher.department = self.mathematics
+        teacher.save()
+        teacher.delete()
+        self.assertCounts(0, 0)
+
+    def test_enrollment_counts(self):
+        course = Course.objects.create(name="Algebra", code="ALG101")
+        other = Course.objects.create(name="Geometry", code="GEO101")
+        student = Student.objects.create(
+            first_name="Grace",
+            last_name="Hopper",
+            email="grace@example.com",
+            enrollment_date=date(2024, 1, 1),
+        )
+        enrollment = Enrollment.objects.create(
+            student=student, course=course, enrollment_date=date(2024, 1, 1)
+        )
+        enrollment.course = other
+        enrollment.save()
+        course.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((course.enrollment_count, other.enrollment_count), (0, 1))
+        self.assertEqual(
+            counters.recount(dry_run=True), dict.fromkeys(counters.COUNTERS, 0)
+        )
+
+
+class KeysetChangeListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser("+92-000000000-0", "secret")
+        Student.objects.bulk_create(
+            Student(
+                first_name=f"Student {number}",
+                last_name="Test",
+                email=f"student{number}@example.com",
+                enrollment_date=date(2024, 1, 1),
+            )
+            for number in range(150)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_next_page_differs(self):
+        url = reverse("admin:myapp_student_changelist")
+        response = self.client.get(url)
+        self.assertTemplateUsed(response, "admin/keyset_change_list.html")
+        first = response.context["cl"]
+        self.assertTrue(first.keyset)
+        self.assertContains(response, first.next_url.replace("&", "&amp;"))
+
+        response = self.client.get(url + first.next_url)
+        second = response.context["cl"]
+        self.assertEqual(len(first.result_list) + len(second.result_list), 150)
+        self.assertFalse(
+            {row.pk for row in first.result_list}
+            & {row.pk for row in second.result_list}
+        )
+        self.assertIsNone(second.next_url)
+
+    def test_benchmark_reaches_page_by_cursor(self):
+        url = reverse("admin:myapp_student_changelist")
+        first = self.client.get(url).context["cl"]
+        response = self.client.get(url, keyset_page(Student, 2))
+        second = response.context["cl"]
+        self.assertTrue(second.keyset)
+        self.assertEqual(response.request["QUERY_STRING"], first.next_url[1:])
+
+
+class FragmentVersionTests(TestCase):
+    def test_untracked_models_fast_delete(self):
+        collector = Collector(using=DEFAULT_DB_ALIAS)
+        self.assertTrue(collector.can_fast_delete(Change.objects.all()))
+
+    def test_save_bumps_version(self):
+        before = fragments.versions([Department])
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name="Physics")
+        self.assertNotEqual(fragments.versions([Department]), before)
+
+
+class ChangeFeedBulkTests(TestCase):
+    def actions(self, model):
+        return sorted(
+            Change.objects.filter(model=model).values_list("object_id", "action")
+        )
+
+    def test_populate_logs_inserts(self):
+        call_command("populate", "--seed", "1", stdout=StringIO())
+        pks = Student.objects.order_by("pk").values_list("pk", flat=True)
+        self.assertEqual(
+            self.actions("students"), [(pk, Change.INSERT) for pk in pks]
+        )
+        self.assertEqual(
+            Change.objects.filter(model="enrollments").count(),
+            Enrollment.objects.count(),
+        )
+
+    def test_clear_data_logs_deletes(self):
+        call_command("populate", "--seed", "1", stdout=StringIO())
+        pks = sorted(Student.objects.values_list("pk", flat=True))
+        call_command("clear_data", stdout=StringIO())
+        self.assertEqual(
+            [pk for pk, action in self.actions("students") if action == Change.DELETE],
+            pks,
+        )
+
+    def test_delete_rows_logs_nulled_references(self):
+        teacher = Teacher.objects.create(
+            first_name="Ada", last_name="Lovelace", email="ada@example.com"
+        )
+        course = Course.objects.create(name="Analysis", code="ANA101", teacher=teacher)
+        Change.objects.all().delete()
+        delete_rows(Teacher.objects.all(), 100)
+        self.assertEqual(self.actions("courses"), [(course.pk, Change.UPDATE)])
+
+    def test_bulk_update_logs_updates(self):
+        student = Student.objects.create(
+            first_name="Alan",
+            last_name="Turing",
+            email="alan@example.com",
+            enrollment_date=date(2024, 1, 1),
+        )
+        Change.objects.all().delete()
+        model_admin = admin.site._registry[Student]
+        request = RequestFactory().post("/")
+        model_admin.bulk_update(request, Student.objects.all(), first_name="ALAN")
+        self.assertEqual(self.actions("students"), [(student.pk, Change.UPDATE)])
+
+
+class PopulateTests(TestCase):
+    def test_repeated_runs_after_deletes(self):
+        call_command("populate", "--seed", "1", stdout=StringIO())
+        Teacher.objects.order_by("pk").first().delete()
+        Student.objects.order_by("pk").first().delete()
+        Course.objects.order_by("pk").first().delete()
+        call_command("populate", "--seed", "1", stdout=StringIO())
+        self.assertEqual(Teacher.objects.count(), 9)
+        self.assertEqual(Student.objects.count(), 9)
+        self.assertEqual(Course.objects.count(), 9)
+
+
+class TransferTests(TestCase):
+    def test_round_trip_keeps_department_heads(self):
+        department = Department.objects.create(name="Mathematics")
+        teacher = Teacher.objects.create(
+            first_name="Ada",
+            last_name="Lovelace",
+            email="ada@example.com",
+            department=department,
+        )
+        department.head = teacher
+        department.save()
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {
+                name: os.path.join(directory, f"{name}.csv")
+                for name in ("department", "teacher")
+            }
+            for name, path in paths.items():
+                call_command("export_data", name, path, stdout=StringIO())
+            Teacher.objects.all().delete()
+            Department.objects.all().delete()
+
+            out = StringIO()
+            call_command("import_data", "department", paths["department"], stdout=out)
+            self.assertIn("--link", out.getvalue())
+            call_command("import_data", "teacher", paths["teacher"], stdout=StringIO())
+            call_command(
+                "import_data",
+                "department",
+                paths["department"],
+                "--link",
+                stdout=StringIO(),
+            )
+
+        department = Department.objects.get(name="Mathematics")
+        self.assertEqual(department.head.email, "ada@example.com")
+        self.assertEqual(department.head.department, department)
+
+
+class BatchValidatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Mathematics")
+        Teacher.objects.create(
+            first_name="Ada",
+            last_name="Lovelace",
+            email="ada@example.com",
+            department=cls.department,
+        )
+
+    def teacher(self, email, department_id=None):
+        return {
+            "first_name": "Alan",
+            "last_name": "Turing",
+            "email": email,
+            "department_id": department_id,
+        }
+
+    def test_reports_rows_by_index(self):
+        errors = BatchValidator(Student).validate(
+            [
+                {
+                    "first_name": "Grace",
+                    "last_name": "Hopper",
+                    "email": "grace@example.com",
+                    "enrollment_date": date(2024, 1, 1),
+                },
+                {
+                    "first_name": "",
+                    "last_name": "Hopper",
+                    "email": "not an email",
+                    "enrollment_date": timezone.now().date() + timedelta(days=1),
+                },
+            ]
+        )
+        self.assertEqual(list(errors), [1])
+        self.assertEqual(
+            [message.split(":")[0] for message in errors[1]],
+            ["first_name", "email", "enrollment_date"],
+        )
+
+    def test_checks_unique_and_foreign_keys_once_per_batch(self):
+        validator = BatchValidator(Teacher, database=True)
+        rows = [
+            self.teacher("ada@example.com", self.department.pk),
+            self.teacher("alan@example.com", self.department.pk),
+            self.teacher("alan@example.com"),
+            self.teacher("joan@example.com", self.department.pk + 1),
+        ]
+        # One query for the emails, one for the departments.
+        with self.assertNumQueries(2):
+            errors = validator.validate(rows)
+        self.assertEqual(
+            errors,
+            {
+                0: ["email: Teacher with this email already exists."],
+                2: ["email: Teacher with this email already exists."],
+                3: [
+                    f"department_id: department instance with id "
+                    f"{self.department.pk + 1} does not exist."
+                ],
+            },
+        )
+
+    def test_database_checks_are_opt_in(self):
+        rows = [self.teacher("ada@example.com", self.department.pk + 1)]
+        with self.assertNumQueries(0):
+            self.assertEqual(BatchValidator(Teacher).validate(rows), {})
+
+
+class ReportRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Algebra", code="ALG101")
+        cls.students = Student.objects.bulk_create(
+            Student(
+                first_name="Student",
+                last_name=str(number),
+                email=f"student{number}@example.com",
+                enrollment_date=date(2024, 1, 1),
+            )
+            for number in range(4)
+        )
+
+    def enroll(self, student, enrollment_date):
+        Enrollment.objects.create(
+            student=student, course=self.course, enrollment_date=enrollment_date
+        )
+
+    def summary(self):
+        return dict(
+            CourseMonthlyEnrollment.objects.values_list("month", "enrollment_count")
+        )
+
+    def test_incremental_refresh_from_watermark(self):
+        self.enroll(self.students[0], date(2024, 1, 10))
+        self.enroll(self.students[1], date(2024, 2, 5))
+        call_command("refresh_reports", stdout=StringIO())
+        self.assertEqual(self.summary(), {date(2024, 1, 1): 1, date(2024, 2, 1): 1})
+        state = ReportRefresh.objects.get(name=reports.MONTHLY)
+        self.assertEqual(state.watermark, date(2024, 2, 5))
+        self.assertIsNotNone(state.refreshed_at)
+
+        # Later in the watermark's month is picked up; a backdated one is not.
+        self.enroll(self.students[2], date(2024, 2, 20))
+        self.enroll(self.students[3], date(2024, 1, 20))
+        call_command("refresh_reports", stdout=StringIO())
+        self.assertEqual(self.summary(), {date(2024, 1, 1): 1, date(2024, 2, 1): 2})
+
+        call_command("refresh_reports", "--full", stdout=StringIO())
+        self.assertEqual(self.summary(), {date(2024, 1, 1): 2, date(2024, 2, 1): 2})
+
+    def test_since_recounts_after_deletes(self):
+        self.enroll(self.students[0], date(2024, 1, 10))
+        self.enroll(self.students[1], date(2024, 3, 5))
+        reports.refresh_monthly()
+        Enrollment.objects.filter(enrollment_date=date(2024, 1, 10)).delete()
+        reports.refresh_monthly()
+        self.assertEqual(self.summary(), {date(2024, 1, 1): 1, date(2024, 3, 1): 1})
+        reports.refresh_monthly(since=date(2024, 1, 15))
+        self.assertEqual(self.summary(), {date(2024, 3, 1): 1})
+
+
+class LoadTestCommandTests(TestCase):
+    def test_rejects_empty_runs(self):
+        for option in ["--requests", "--concurrency"]:
+            with self.subTest(option=option):
+                with self.assertRaisesMessage(
+                    CommandError, f"{option} must be at least 1."
+                ):
+                    call_command("loadtest", "http://127.0.0.1:9/", option, "0")
+
+
+class SchedulingTests(TestCase):
+    # (id, capacity or size, department id) tuples.
+    rooms = [(1, 30, 1), (2, 40, 2), (3, 60, 1)]
+
+    def test_greedy_best_fit(self):
+        courses = [(10, 25, 2), (11, 55, 1), (12, 70, 1), (13, 28, 1)]
+        result = scheduling.schedule_greedy(courses, self.rooms, slots=1)
+        self.assertEqual(result.assignments, [(11, 3, 0), (13, 1, 0), (10, 2, 0)])
+        self.assertEqual(result.unassigned, [12])
+        self.assertEqual(
+            result.summary(),
+            {"assigned": 3, "unassigned": 1, "wasted_seats": 22, "other_department": 0},
+        )
+
+    def test_greedy_department_preference(self):
+        courses = [(10, 25, 2)]
+        preferred = scheduling.schedule_greedy(courses, self.rooms)
+        anywhere = scheduling.schedule_greedy(
+            courses, self.rooms, prefer_department=False
+        )
+        self.assertEqual(preferred.assignments, [(10, 2, 0)])
+        self.assertEqual(anywhere.assignments, [(10, 1, 0)])
+
+    def test_greedy_fills_slots(self):
+        courses = [(number, 10, 1) for number in range(4)]
+        result = scheduling.schedule_greedy(courses, self.rooms[:1], slots=3)
+        self.assertEqual([slot for _, _, slot in result.assignments], [0, 1, 2])
+        self.assertEqual(result.unassigned, [3])
+
+    def test_min_cost_assignment(self):
+        cost = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+        self.assertEqual(scheduling.min_cost_assignment(cost), [1, 0, 2])
+
+    def test_matching_weighs_department_penalty(self):
+        courses = [(10, 25, 1), (11, 35, 2), (12, 70, 1)]
+        result = scheduling.schedule_matching(courses, self.rooms, slots=1)
+        self.assertEqual(sorted(result.assignments), [(10, 1, 0), (11, 2, 0)])
+        self.assertEqual(result.unassigned, [12])
+
+        # Room 1 wastes fewer seats but belongs to another department.
+        course = [(10, 25, 2)]
+        penalized = scheduling.schedule_matching(course, self.rooms, slots=1)
+        free = scheduling.schedule_matching(
+            course, self.rooms, slots=1, department_penalty=0
+        )
+        self.assertEqual(penalized.assignments, [(10, 2, 0)])
+        self.assertEqual(free.assignments, [(10, 1, 0)])
+
+    def test_command_rejects_no_slots(self):
+        with self.assertRaisesMessage(CommandError, "--slots must be at least 1."):
+            call_command("schedule_rooms", "--slots", "0", stdout=StringIO())
+
+
+class QueryCountTests(TestCase):
+    """Listing pages cost a fixed number of queries, however many rows they show."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser("+92-000000000-0", "secret")
+        department = Department.objects.create(name="Mathematics")
+        teachers = Teacher.objects.bulk_create(
+            Teacher(
+                first_name="Teacher",
+                last_name=str(number),
+                email=f"teacher{number}@example.com",
+                department=department,
+            )
+            for number in range(3)
+        )
+        Classroom.objects.bulk_create(
+            Classroom(
+                room_number=str(100 + number),
+                capacity=20 * number,
+                department=department,
+            )
+            for number in range(1, 6)
+        )
+        courses = Course.objects.bulk_create(
+            Course(name="Course", code=f"CRS{number:03d}", teacher=teachers[number % 3])
+            for number in range(5)
+        )
+        students = Student.objects.bulk_create(
+            Student(
+                first_name="Student",
+                last_name=str(number),
+                email=f"student{number}@example.com",
+                enrollment_date=date(2024, 1, 1),
+            )
+            for number in range(20)
+        )
+        Enrollment.objects.bulk_create(
+            Enrollment(
+                student=student,
+                course=courses[number % 5],
+                enrollment_date=date(2024, 1, 1),
+            )
+            for number, student in enumerate(students)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        fragments.get_cache().clear()
+        # Load the session and user before counting.
+        self.client.get(reverse("admin:index"))
+
+    def assertChangeListQueries(self, model, num):
+        url = reverse(f"admin:myapp_{model._meta.model_name}_changelist")
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def assertListQueries(self, resource, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(f"/api/{resource}/")
+            b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+    def test_student_change_list(self):
+        # The count and the page of students.
+        self.assertChangeListQueries(Student, 2)
+
+    def test_enrollment_change_list(self):
+        # The count and the page, joined to students and courses.
+        self.assertChangeListQueries(Enrollment, 2)
+
+    def test_course_change_list(self):
+        # The filtered and full counts and the page, joined to teachers.
+        self.assertChangeListQueries(Course, 3)
+
+    def test_teacher_change_list(self):
+        # The filtered and full counts and the page, joined to departments.
+        self.assertChangeListQueries(Teacher, 3)
+
+    def test_department_change_list(self):
+        # The running delete job, read only, then the counts and the page.
+        self.assertChangeListQueries(Department, 4)
+
+    def test_classroom_change_list(self):
+        # The filtered and full counts and the page, joined to departments.
+        self.assertChangeListQueries(Classroom, 3)
+
+    def test_large_classroom_change_list(self):
+        # The threshold floor, once, then the counts and the page.
+        self.assertChangeListQueries(LargeClassroom, 4)
+
+    def test_resource_lists(self):
+        for resource in ["students", "teachers", "courses", "departments"]:
+            with self.subTest(resource=resource):
+                self.assertListQueries(resource, 1)
+
+    def test_enrollment_list(self):
+        # Served by an async view, as an async stream.
+        async def read(response):
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("myapp:enrollment_list"))
+            content = async_to_sync(read)(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content.count(b'"student_id"'), 20)
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser("+92-000000000-0", "secret")
+
+    def setUp(self):
+        profiling.clear()
+        self.addCleanup(profiling.clear)
+
+    def test_fingerprints_collapse_in_lists(self):
+        with profiling.profile("command", "test") as record:
+            list(Department.objects.filter(pk__in=[1, 2]))
+            list(Department.objects.filter(pk__in=[3, 4, 5]))
+        self.assertEqual(record["queries"], 2)
+        self.assertEqual(len(record["duplicates"]), 1)
+        self.assertEqual(record["duplicates"][0]["count"], 2)
+        self.assertIn("IN (...)", record["duplicates"][0]["sql"])
+        self.assertEqual(profiling.records(), [record])
+
+    def test_ring_buffer_keeps_latest(self):
+        size = profiling._records.maxlen
+        for number in range(size + 5):
+            profiling.store({"number": number})
+        rows = profiling.records()
+        self.assertEqual(len(rows), size)
+        self.assertEqual(rows[0], {"number": 5})
+        self.assertEqual(rows[-1], {"number": size + 4})
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_middleware_records_requests(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("admin:myapp_teacher_changelist"))
+        self.assertEqual(response.status_code, 200)
+        (record,) = profiling.records()
+        self.assertEqual(record["path"], response.request["PATH_INFO"])
+        self.assertEqual(record["name"], "admin:myapp_teacher_changelist")
+        self.assertEqual((record["method"], record["status"]), ("GET", 200))
+        self.assertGreater(record["queries"], 0)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_middleware_unused_when_sampling_is_off(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: None)
+
+
+class CachedModelBackendTests(TestCase):
+    phone_number = "+92-300123456-7"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.phone_number, "secret")
+
+    def setUp(self):
+        self.backend = CachedModelBackend()
+        auth.get_cache().clear()
+        self.addCleanup(auth.get_cache().clear)
+
+    def authenticate(self, password="secret", phone_number=phone_number):
+        return self.backend.authenticate(
+            None, username=phone_number, password=password
+        )
+
+    def test_users_are_cached(self):
+        self.assertEqual(self.authenticate(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_deactivation_invalidates(self):
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+        self.assertIsNone(self.authenticate())
+
+    def test_password_change_invalidates(self):
+        self.assertEqual(self.authenticate(), self.user)
+        self.user.set_password("changed")
+        self.user.save()
+        self.assertIsNone(self.authenticate())
+        self.assertEqual(self.authenticate("changed"), self.user)
+
+    def test_phone_number_change(self):
+        self.assertEqual(self.authenticate(), self.user)
+        self.user.phone_number = "+92-300765432-1"
+        self.user.save()
+        self.assertIsNone(self.authenticate())
+        self.assertEqual(self.authenticate(phone_number="+92-300765432-1"), self.user)
+
+
+class ProvisionUsersTests(TestCase):
+    def provision(self, content, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.csv")
+            with open(path, "w", encoding="utf-8") as out:
+                out.write(content)
+            call_command(
+                "provision_users", path, "--workers", "1", *args, stdout=StringIO()
+            )
+
+    def test_creates_users(self):
+        CustomUser.objects.create_user("+92-000000000-1", "taken")
+        self.provision(
+            "phone_number,password,first_name\n"
+            "+92-000000000-1,other,Taken\n"
+            "+92-000000000-2,secret,Ada\n"
+            "+92-000000000-2,again,Twice\n"
+            "+92-000000000-3,,Alan\n"
+        )
+        self.assertEqual(CustomUser.objects.count(), 3)
+        ada = CustomUser.objects.get(phone_number="+92-000000000-2")
+        self.assertEqual(ada.first_name, "Ada")
+        self.assertTrue(ada.check_password("secret"))
+        alan = CustomUser.objects.get(phone_number="+92-000000000-3")
+        self.assertFalse(alan.has_usable_password())
+        taken = CustomUser.objects.get(phone_number="+92-000000000-1")
+        self.assertTrue(taken.check_password("taken"))
+
+    def test_invalid_rows(self):
+        content = "phone_number,password\n+92-000000000-2,secret\n0300,secret\n"
+        with self.assertRaisesMessage(CommandError, "Row 2: phone_number:"):
+            self.provision(content)
+        self.assertFalse(CustomUser.objects.exists())
+        self.provision(content, "--skip-invalid")
+        self.assertEqual(
+            list(CustomUser.objects.values_list("phone_number", flat=True)),
+            ["+92-000000000-2"],
+        )
+
+
+class PasswordRehashTests(TestCase):
+    SCRYPT = "myapp.hashers.TunedScryptPasswordHasher"
+    PBKDF2 = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("+92-000000000-1")
+
+    def set_password(self, hashers, **scrypt):
+        with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_SCRYPT=scrypt):
+            self.user.set_password("secret")
+            self.user.save()
+        return self.user.password
+
+    def log_in(self, hashers, **scrypt):
+        with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_SCRYPT=scrypt):
+            self.assertTrue(self.user.check_password("secret"))
+        self.user.refresh_from_db()
+        return self.user.password
+
+    def test_cost_change_rehashes(self):
+        old = self.set_password([self.SCRYPT], work_factor=2**10)
+        self.assertEqual(self.log_in([self.SCRYPT], work_factor=2**10), old)
+        new = self.log_in([self.SCRYPT], work_factor=2**11)
+        self.assertNotEqual(new, old)
+        self.assertTrue(new.startswith("scrypt$"))
+        self.assertIn(f"${2**11}$", new)
+
+    def test_preferred_hasher_upgrades_old_hashes(self):
+        old = self.set_password([self.PBKDF2, self.SCRYPT])
+        self.assertTrue(old.startswith("pbkdf2_sha256$"))
+        new = self.log_in([self.SCRYPT, self.PBKDF2], work_factor=2**10)
+        self.assertTrue(new.startswith("scrypt$"))
+
+
+class RowButtonsTests(TestCase):
+    def setUp(self):
+        self.model_admin = admin.site._registry[Department]
+
+    def expected(self, pk):
+        edit = reverse("admin:myapp_department_change", args=[quote(pk)])
+        delete = reverse("admin:myapp_department_delete", args=[quote(pk)])
+        return (
+            f'<a class="button" href="{edit}">Edit Department</a>',
+            f'<a class="button" href="{delete}" style="color:red;">'
+            "Delete Department</a>",
+        )
+
+    def buttons(self, pk):
+        obj = Department(pk=pk)
+        return (
+            self.model_admin.edit_button(obj),
+            self.model_admin.delete_button(obj),
+        )
+
+    def test_matches_reverse(self):
+        for pk in [1, 42, "a/b_<c>&"]:
+            with self.subTest(pk=pk):
+                self.assertEqual(self.buttons(pk), self.expected(pk))
+
+    def test_script_prefix(self):
+        self.buttons(1)
+        set_script_prefix("/school/")
+        self.addCleanup(set_script_prefix, "/")
+        edit, delete = self.buttons(1)
+        self.assertEqual((edit, delete), self.expected(1))
+        self.assertIn('href="/school/admin/', edit)
+
+
+class LargeClassroomTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Mathematics")
+        Classroom.objects.create(
+            room_number="101", capacity=30, department=cls.department
+        )
+        Classroom.objects.create(room_number="102", capacity=60)
+
+    def test_floor_is_looked_up_once(self):
+        with self.assertNumQueries(1):
+            large = LargeClassroom.objects.all()
+            str(large.query)
+        with self.assertNumQueries(1):
+            large.explain()
+        with self.assertNumQueries(2):
+            self.assertEqual(large.count(), 1)
+            self.assertEqual([room.room_number for room in large], ["102"])
+
+    def test_lower_department_threshold(self):
+        Department.objects.update(large_classroom_capacity=20)
+        self.assertEqual(
+            sorted(room.room_number for room in LargeClassroom.objects.all()),
+            ["101", "102"],
+        )
+        self.assertEqual(
+            [room.room_number for room in Classroom.objects.large(floor=50)], ["102"]
+        )
+
+    def test_zero_threshold(self):
+        self.department.large_classroom_capacity = 0
+        room = LargeClassroom(capacity=1, department=self.department)
+        self.assertTrue(room.is_large())
+        room.capacity = 0
+        self.assertFalse(room.is_large())
+
+
+class ListParameterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser("+92-000000000-0", "secret")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertError(self, query, message):
+        response = self.client.get(f"/api/students/?{query}")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": message})
+
+    def test_bounds_in_messages(self):
+        self.assertError("after=-1", "'after' must be 0 or more.")
+        self.assertError("limit=-1", f"'limit' must be between 0 and {MAX_LIMIT}.")
+        self.assertError("limit=x", "'limit' must be an integer.")
+
+
+class JobQueueTests(TestCase):
+    def running_job(self, seconds_ago):
+        at = timezone.now() - timedelta(seconds=seconds_ago)
+        return Job.objects.create(
+            kind=jobs.DELETE_DEPARTMENTS,
+            status=Job.RUNNING,
+            started_at=at,
+            heartbeat_at=at,
+        )
+
+    def test_enqueue_reuses_live_job(self):
+        job = self.running_job(10)
+        self.assertEqual(jobs.enqueue(jobs.DELETE_DEPARTMENTS), job)
+
+    def test_enqueue_replaces_stale_job(self):
+        stale = self.running_job(jobs.stale_seconds() + 10)
+        with self.assertNumQueries(0):
+            active = jobs.active(jobs.DELETE_DEPARTMENTS)
+        self.assertFalse(active.exists())
+        job = jobs.enqueue(jobs.DELETE_DEPARTMENTS)
+        self.assertNotEqual(job, stale)
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_worker_fails_stale_jobs(self):
+        stale = self.running_job(jobs.stale_seconds() + 10)
+        live = self.running_job(10)
+        call_command("run_jobs", "--once", stdout=StringIO(), stderr=StringIO())
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, Job.FAILED)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(live.status, Job.RUNNING)
+
+
+class KeysetSeekTests(TestCase):
+    def seek_enrollments(self, forward):
+        queryset = Enrollment.objects.order_by("-enrollment_date", "student", "-pk")
+        columns = keyset_columns(Enrollment, queryset.query.order_by)
+        return seek(queryset, columns, [date(2024, 1, 1), 1, 1], forward)
+
+    def test_leading_column_bound(self):
+        for forward, lookup_name in [(True, "lte"), (False, "gte")]:
+            with self.subTest(forward=forward):
+                bound = self.seek_enrollments(forward).query.where.children[0]
+                self.assertEqual(bound.lhs.target.name, "enrollment_date")
+                self.assertEqual(bound.lookup_name, lookup_name)
+
+    @skipUnless(connection.vendor == "sqlite", "Plan format is SQLite's.")
+    def test_plan_seeks_into_index(self):
+        plan = self.seek_enrollments(True)[:100].explain()
+        self.assertIn("SEARCH myapp_enrollment USING INDEX", plan)
+
+
+class RosterInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.algebra = Course.objects.create(name="Algebra", code="ALG101")
+        cls.biology = Course.objects.create(name="Biology", code="BIO101")
+        cls.student = Student.objects.create(
+            first_name="Alan",
+            last_name="Turing",
+            email="alan@example.com",
+            enrollment_date=date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        rosters.clear()
+
+    def test_moved_enrollment_invalidates_both_courses(self):
+        enrollment = Enrollment.objects.create(
+            student=self.student, course=self.algebra, enrollment_date=date(2024, 1, 1)
+        )
+        self.assertEqual(len(rosters.course_roster(self.algebra.pk)), 1)
+        self.assertEqual(rosters.course_enrollment_count(self.algebra.pk), 1)
+        self.assertEqual(rosters.course_enrollment_count(self.biology.pk), 0)
+
+        enrollment.course = self.biology
+        enrollment.save()
+        self.assertEqual(rosters.course_roster(self.algebra.pk), [])
+        self.assertEqual(rosters.course_enrollment_count(self.algebra.pk), 0)
+        self.assertEqual(rosters.course_enrollment_count(self.biology.pk), 1)
+
+    def test_bulk_action_invalidates_rosters(self):
+        Enrollment.objects.create(
+            student=self.student, course=self.algebra, enrollment_date=date(2024, 1, 1)
+        )
+        for select_across in ["0", "1"]:
+            with self.subTest(select_across=select_across):
+                rosters.course_roster(self.algebra.pk)
+                first_name = "ALAN" if select_across == "0" else "Al"
+                request = RequestFactory().post("/", {"select_across": select_across})
+                admin.site._registry[Student].bulk_update(
+                    request, Student.objects.all(), first_name=first_name
+                )
+                roster = rosters.course_roster(self.algebra.pk)
+                self.assertEqual(roster[0]["first_name"], first_name)
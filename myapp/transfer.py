@@ -0,0 +1,288 @@
+import csv
+import json
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from .bulk import batched
+from .models import Department, Teacher, Student, Course, Classroom, Enrollment
+from .validation import BatchValidator
+
+FORMATS = ("csv", "jsonl")
+
+
+class Column:
+    """A column in an import/export file.
+
+    ``source`` is the ORM path read on export. Columns with a ``ref`` hold a
+    natural key (an email, a course code, ...) that is mapped back to the
+    foreign key id through an in-memory lookup on import. ``deferred``
+    references point at a table imported later: they are left empty on
+    import and set by a second pass over the same file (Importer.link()).
+    """
+
+    def __init__(self, name, source=None, ref=None, deferred=False):
+        self.name = name
+        self.source = source or name
+        self.ref = ref
+        self.deferred = deferred
+
+
+class Spec:
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = columns
+
+    def target(self, column):
+        """Return the concrete model field a column is written to on import."""
+        return self.model._meta.get_field(column.source.split("__")[0])
+
+
+SPECS = {
+    "department": Spec(
+        Department,
+        [
+            Column("id"),
+            Column("name"),
+            Column("location"),
+            # Teachers reference their department, so the heads can only be
+            # set once the teachers are loaded.
+            Column("head_email", "head__email", ref=(Teacher, "email"), deferred=True),
+        ],
+    ),
+    "teacher": Spec(
+        Teacher,
+        [
+            Column("first_name"),
+            Column("last_name"),
+            Column("email"),
+            Column("department_id", "department__id", ref=(Department, "id")),
+        ],
+    ),
+    "student": Spec(
+        Student,
+        [
+            Column("first_name"),
+            Column("last_name"),
+            Column("email"),
+            Column("enrollment_date"),
+        ],
+    ),
+    "course": Spec(
+        Course,
+        [
+            Column("name"),
+            Column("code"),
+            Column("teacher_email", "teacher__email", ref=(Teacher, "email")),
+        ],
+    ),
+    "classroom": Spec(
+        Classroom,
+        [
+            Column("room_number"),
+            Column("capacity"),
+            Column("department_id", "department__id", ref=(Department, "id")),
+        ],
+    ),
+    "enrollment": Spec(
+        Enrollment,
+        [
+            Column("student_email", "student__email", ref=(Student, "email")),
+            Column("course_code", "course__code", ref=(Course, "code")),
+            Column("enrollment_date"),
+        ],
+    ),
+}
+
+
+def guess_format(path):
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def can_copy():
+    """Whether COPY can be streamed through the active database driver."""
+    if connection.vendor != "postgresql":
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def read_rows(fileobj, fmt):
+    """Yield one dict per record in ``fileobj`` without reading it all."""
+    if fmt == "csv":
+        yield from csv.DictReader(fileobj)
+    else:
+        for line in fileobj:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Importer:
+    def __init__(self, spec, batch_size=5000, skip_invalid=False):
+        self.spec = spec
+        self.batch_size = batch_size
+        self.skip_invalid = skip_invalid
+        self.fields = [spec.target(column) for column in spec.columns]
+        self.lookups = {}
+        self.unresolved = 0
+        self.invalid = 0
+        self.deferred = 0
+
+    def lookup(self, ref):
+        if ref not in self.lookups:
+            model, key = ref
+            self.lookups[ref] = {
+                str(value): pk
+                for value, pk in model.objects.values_list(key, "pk").iterator(
+                    chunk_size=self.batch_size
+                )
+            }
+        return self.lookups[ref]
+
+    def convert(self, rows):
+        """Turn file records into value tuples in ``self.fields`` order."""
+        for number, record in enumerate(rows, start=1):
+            values = []
+            for column, field in zip(self.spec.columns, self.fields):
+                if column.name not in record:
+                    raise ValueError(
+                        f"Row {number}: missing column '{column.name}'."
+                    )
+                value = record[column.name]
+                if value == "" and field.null:
+                    value = None
+                if column.deferred and value is not None:
+                    self.deferred += 1
+                    value = None
+                if column.ref and value is not None:
+                    value = self.resolve(column, field, value, number)
+                values.append(value)
+            yield tuple(values)
+
+    def resolve(self, column, field, value, number):
+        pk = self.lookup(column.ref).get(str(value))
+        if pk is None:
+            if not field.null:
+                raise ValueError(f"Row {number}: unknown {column.name} {value!r}.")
+            self.unresolved += 1
+        return pk
+
+    def validated(self, rows):
+        """Validate converted rows a batch at a time.
+
+        Invalid rows abort the import, or are dropped and counted when
+        ``skip_invalid`` is set.
+        """
+        attnames = [field.attname for field in self.fields]
+        validator = BatchValidator(self.spec.model, attnames, database=True)
+        first = 1
+        for batch in batched(rows, self.batch_size):
+            errors = validator.validate([dict(zip(attnames, row)) for row in batch])
+            if errors and not self.skip_invalid:
+                index = min(errors)
+                raise ValueError(f"Row {first + index}: {'; '.join(errors[index])}")
+            self.invalid += len(errors)
+            for index, row in enumerate(batch):
+                if index not in errors:
+                    yield row
+            first += len(batch)
+
+    def run(self, rows, stats):
+        rows = self.validated(self.convert(rows))
+        with transaction.atomic():
+            if can_copy():
+                self.copy(rows, stats)
+            else:
+                self.bulk_create(rows, stats)
+            if any(column.name == "id" for column in self.spec.columns):
+                self.reset_sequence()
+
+    def link(self, rows, stats):
+        """Set the deferred references of rows imported earlier from ``rows``.
+
+        Rows are matched on the spec's primary key column, so this is the
+        second pass over the file the rows were imported from.
+        """
+        model = self.spec.model
+        deferred = [column for column in self.spec.columns if column.deferred]
+        keys = [
+            column
+            for column in self.spec.columns
+            if self.spec.target(column).primary_key
+        ]
+        if not deferred or not keys:
+            raise ValueError(f"{model.__name__} has no references to link.")
+        key = keys[0]
+        fields = [self.spec.target(column) for column in deferred]
+        with transaction.atomic():
+            for batch in batched(enumerate(rows, start=1), self.batch_size):
+                objs = []
+                for number, record in batch:
+                    if key.name not in record:
+                        raise ValueError(f"Row {number}: missing column '{key.name}'.")
+                    obj = model(pk=record[key.name])
+                    for column, field in zip(deferred, fields):
+                        value = record.get(column.name) or None
+                        if value is not None:
+                            value = self.resolve(column, field, value, number)
+                        setattr(obj, field.attname, value)
+                    objs.append(obj)
+                model.objects.bulk_update(objs, [field.name for field in fields])
+                stats.add(len(objs))
+
+    def copy(self, rows, stats):
+        quote = connection.ops.quote_name
+        sql = "COPY {} ({}) FROM STDIN".format(
+            quote(self.spec.model._meta.db_table),
+            ", ".join(quote(field.column) for field in self.fields),
+        )
+        with connection.cursor() as cursor, cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+                stats.add(1)
+
+    def bulk_create(self, rows, stats):
+        model = self.spec.model
+        attnames = [field.attname for field in self.fields]
+        for batch in batched(rows, self.batch_size):
+            model.objects.bulk_create(
+                [model(**dict(zip(attnames, row))) for row in batch]
+            )
+            stats.add(len(batch))
+
+    def reset_sequence(self):
+        model = self.spec.model
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+
+
+def export_rows(spec, out, fmt, stats, batch_size=5000):
+    """Write every row of ``spec.model`` to ``out`` in primary key order."""
+    names = [column.name for column in spec.columns]
+    queryset = spec.model.objects.order_by("pk").values_list(
+        *(column.source for column in spec.columns)
+    )
+    if fmt == "csv":
+        # Match the line endings COPY ... (FORMAT csv) produces.
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(names)
+        if can_copy():
+            sql, params = queryset.query.sql_with_params()
+            sql = f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)"
+            with connection.cursor() as cursor, cursor.copy(sql, params) as copy:
+                # The server sends one COPY data message per row.
+                for data in copy:
+                    out.write(bytes(data).decode())
+                    stats.add(1)
+            return
+        for row in queryset.iterator(chunk_size=batch_size):
+            writer.writerow(row)
+            stats.add(1)
+    else:
+        for row in queryset.iterator(chunk_size=batch_size):
+            out.write(json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder))
+            out.write("\n")
+            stats.add(1)
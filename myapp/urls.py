@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+app_name = "myapp"
+
+urlpatterns = [
+    # Async views; listed first so they take precedence over the generic routes.
+    path("courses/<int:pk>/", views.course_detail, name="course_detail"),
+    path("courses/<int:pk>/roster/", views.course_roster, name="course_roster"),
+    path("enrollments/", views.enrollment_list, name="enrollment_list"),
+    path("cache/stats/", views.cache_stats, name="cache_stats"),
+    path("changes/", views.change_feed, name="change_feed"),
+    path("<str:resource>/", views.resource_list, name="resource_list"),
+    path("<str:resource>/<int:pk>/", views.resource_detail, name="resource_detail"),
+]
@@ -0,0 +1,160 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxLengthValidator
+from django.utils import timezone
+from .models import (
+    COURSE_CODE_MESSAGE,
+    COURSE_CODE_RE,
+    EMAIL_MESSAGE,
+    EMAIL_RE,
+    FUTURE_DATE_MESSAGE,
+    PHONE_NUMBER_MESSAGE,
+    PHONE_NUMBER_RE,
+    Course,
+    CustomUser,
+    Enrollment,
+    Student,
+    Teacher,
+)
+
+
+def matches(pattern, message):
+    match = pattern.match
+
+    def check(value, today):
+        if not match(value):
+            return message
+
+    return check
+
+
+def not_in_future(value, today):
+    if value > today:
+        return FUTURE_DATE_MESSAGE
+
+
+# The checks each model's clean() (or PhoneNumberField.validate) performs,
+# keyed by attname so they can run column by column.
+RULES = {
+    CustomUser: {"phone_number": [matches(PHONE_NUMBER_RE, PHONE_NUMBER_MESSAGE)]},
+    Teacher: {"email": [matches(EMAIL_RE, EMAIL_MESSAGE)]},
+    Student: {"enrollment_date": [not_in_future]},
+    Course: {"code": [matches(COURSE_CODE_RE, COURSE_CODE_MESSAGE)]},
+    Enrollment: {"enrollment_date": [not_in_future]},
+}
+
+
+class BatchValidator:
+    """Validate many rows of one model at once.
+
+    Runs the same checks as ``full_clean()`` for non-relational columns plus
+    the model's ``clean()`` rules, but one column at a time over the whole
+    batch, with compiled patterns and a single "today" per batch. Rows are
+    mappings keyed by attname; a model instance's ``__dict__`` works.
+
+    With ``database`` set, unique columns and foreign keys are checked too,
+    with one query per column per batch; rows repeating a unique value of
+    an earlier row in the batch are reported as well. Otherwise they are
+    left to the database.
+    """
+
+    def __init__(self, model, fields=None, database=False):
+        self.model = model
+        selected = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key and (fields is None or field.attname in fields)
+        ]
+        self.fields = [field for field in selected if not field.is_relation]
+        self.rules = RULES.get(model, {})
+        self.unique = []
+        self.foreign_keys = []
+        if database:
+            self.unique = [field for field in selected if field.unique]
+            self.foreign_keys = [field for field in selected if field.is_relation]
+
+    def validate(self, rows):
+        """Return ``{row index: [message, ...]}`` for the invalid rows."""
+        today = timezone.now().date()
+        errors = {}
+        for field in self.fields:
+            name = field.attname
+            to_python = field.to_python
+            max_length = field.max_length
+            # MaxLengthValidator is checked inline; it duplicates max_length.
+            validators = [
+                validator
+                for validator in field.validators
+                if not isinstance(validator, MaxLengthValidator)
+            ]
+            rules = self.rules.get(name, ())
+            for index, row in enumerate(rows):
+                value = row.get(name)
+                if value is None or value == "":
+                    if not (field.null if value is None else field.blank):
+                        errors.setdefault(index, []).append(
+                            f"{name}: This field cannot be blank."
+                        )
+                    continue
+                try:
+                    value = to_python(value)
+                    for validator in validators:
+                        validator(value)
+                except ValidationError as e:
+                    errors.setdefault(index, []).extend(
+                        f"{name}: {message}" for message in e.messages
+                    )
+                    continue
+                if max_length is not None and len(value) > max_length:
+                    errors.setdefault(index, []).append(
+                        f"{name}: Ensure this value has at most {max_length} "
+                        "characters."
+                    )
+                for rule in rules:
+                    message = rule(value, today)
+                    if message:
+                        errors.setdefault(index, []).append(f"{name}: {message}")
+        for field in self.unique:
+            self.check_unique(field, rows, errors)
+        for field in self.foreign_keys:
+            self.check_foreign_key(field, rows, errors)
+        return errors
+
+    def check_unique(self, field, rows, errors):
+        name = field.attname
+        values = {row.get(name) for row in rows} - {None, ""}
+        taken = set(
+            self.model._base_manager.filter(**{f"{name}__in": values}).values_list(
+                name, flat=True
+            )
+        )
+        message = (
+            f"{name}: {self.model._meta.verbose_name.capitalize()} with this "
+            f"{field.verbose_name} already exists."
+        )
+        for index, row in enumerate(rows):
+            value = row.get(name)
+            if value is None or value == "":
+                continue
+            if value in taken:
+                errors.setdefault(index, []).append(message)
+            else:
+                taken.add(value)
+
+    def check_foreign_key(self, field, rows, errors):
+        name = field.attname
+        target = field.target_field
+        values = {row.get(name) for row in rows} - {None, ""}
+        found = set(
+            field.related_model._base_manager.filter(
+                **{f"{target.attname}__in": values}
+            ).values_list(target.attname, flat=True)
+        )
+        model_name = field.related_model._meta.verbose_name
+        for index, row in enumerate(rows):
+            value = row.get(name)
+            if value is None or value == "" or value in found:
+                continue
+            errors.setdefault(index, []).append(
+                f"{name}: {model_name} instance with {target.attname} {value!r} "
+                "does not exist."
+            )
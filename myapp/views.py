@@ -1,3 +1,363 @@
-from django.shortcuts import render
+import asyncio
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.views.decorators.http import require_GET, require_http_methods
+from . import changes, profiling, rosters
+from .bulk import batched
+from .models import Department, Teacher, Student, Course, Classroom, Enrollment
 
-# Create your views here.
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up
+    orjson = None
+
+# Foreign keys are exposed as their raw ``*_id`` columns so listing rows never
+# joins another table.
+RESOURCES = {
+    "students": (
+        Student,
+        ["id", "first_name", "last_name", "email", "enrollment_date"],
+    ),
+    "teachers": (
+        Teacher,
+        ["id", "first_name", "last_name", "email", "department_id"],
+    ),
+    "courses": (Course, ["id", "name", "code", "teacher_id"]),
+    "departments": (Department, ["id", "name", "location", "head_id"]),
+    "classrooms": (Classroom, ["id", "room_number", "capacity", "department_id"]),
+    "enrollments": (
+        Enrollment,
+        ["id", "student_id", "course_id", "enrollment_date"],
+    ),
+}
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 100_000
+CHUNK_SIZE = 2000
+
+
+class BadRequest(Exception):
+    pass
+
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+def api_view(view):
+    """Restrict ``view`` to staff users and turn BadRequest into a 400."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request, resource, *args, **kwargs):
+        if not (request.user.is_active and request.user.is_staff):
+            return json_response({"error": "Staff access required."}, status=403)
+        if resource not in RESOURCES:
+            return json_response({"error": "Not found."}, status=404)
+        try:
+            return view(request, resource, *args, **kwargs)
+        except BadRequest as e:
+            return json_response({"error": str(e)}, status=400)
+
+    return wrapper
+
+
+def get_fields(request, resource):
+    """Return the fields listed in ``?fields=``, or every field."""
+    fields = RESOURCES[resource][1]
+    requested = request.GET.get("fields")
+    if not requested:
+        return fields
+    requested = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = set(requested) - set(fields)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return requested
+
+
+def get_int(request, name, default=None, maximum=None):
+    value = request.GET.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer.")
+    if maximum is None and value < 0:
+        raise BadRequest(f"'{name}' must be 0 or more.")
+    if maximum is not None and not 0 <= value <= maximum:
+        raise BadRequest(f"'{name}' must be between 0 and {maximum}.")
+    return value
+
+
+def async_api_view(view):
+    """``api_view`` for ``async def`` views."""
+
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not (user.is_active and user.is_staff):
+            return json_response({"error": "Staff access required."}, status=403)
+        try:
+            return await view(request, *args, **kwargs)
+        except BadRequest as e:
+            return json_response({"error": str(e)}, status=400)
+
+    return wrapper
+
+
+def encode_chunk(chunk, fields, count):
+    """Encode rows as JSON objects, comma-prefixed unless they come first."""
+    encoded = b",".join(dumps(dict(zip(fields, row))) for row in chunk)
+    return (b"," + encoded) if count else encoded
+
+
+def encode_end(count, limit, last_pk, next_url):
+    more = count == limit and last_pk is not None
+    return b'],"next":' + dumps(next_url(last_pk) if more else None) + b"}"
+
+
+def next_url_builder(request):
+    """Return a function building this URL with ``after`` set to a primary key."""
+
+    def next_url(last_pk):
+        params = request.GET.copy()
+        params["after"] = last_pk
+        return f"{request.path}?{params.urlencode()}"
+
+    return next_url
+
+
+def stream_rows(queryset, fields, limit, next_url):
+    """Yield a ``{"results": [...], "next": ...}`` document a chunk at a time."""
+    select = fields if "id" in fields else [*fields, "id"]
+    pk_index = select.index("id")
+    rows = queryset.values_list(*select).iterator(chunk_size=CHUNK_SIZE)
+
+    yield b'{"results":['
+    count = 0
+    last_pk = None
+    for chunk in batched(rows, CHUNK_SIZE):
+        yield encode_chunk(chunk, fields, count)
+        count += len(chunk)
+        last_pk = chunk[-1][pk_index]
+    yield encode_end(count, limit, last_pk, next_url)
+
+
+async def astream_rows(queryset, fields, limit, next_url):
+    """Async version of ``stream_rows`` reading rows with ``aiterator()``."""
+    select = fields if "id" in fields else [*fields, "id"]
+    pk_index = select.index("id")
+
+    yield b'{"results":['
+    count = 0
+    last_pk = None
+    chunk = []
+    # values_list().aiterator() runs its query outside sync_to_async on
+    # Django 5.1, so read dicts and turn them into tuples here.
+    async for row in queryset.values(*select).aiterator(chunk_size=CHUNK_SIZE):
+        chunk.append(tuple(row[name] for name in select))
+        if len(chunk) == CHUNK_SIZE:
+            yield encode_chunk(chunk, fields, count)
+            count += len(chunk)
+            last_pk = chunk[-1][pk_index]
+            chunk = []
+    if chunk:
+        yield encode_chunk(chunk, fields, count)
+        count += len(chunk)
+        last_pk = chunk[-1][pk_index]
+    yield encode_end(count, limit, last_pk, next_url)
+
+
+def list_query(request, resource):
+    """Build the queryset, fields, limit and next-URL builder for a list view.
+
+    Rows are ordered by id, ``limit`` at a time; the ``next`` URL of a
+    response continues after its last row. ``?<fk>_id=`` filters on a
+    foreign key.
+    """
+    model, all_fields = RESOURCES[resource]
+    fields = get_fields(request, resource)
+    limit = get_int(request, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    after = get_int(request, "after")
+
+    queryset = model.objects.order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    for name in all_fields:
+        if name.endswith("_id") and name in request.GET:
+            queryset = queryset.filter(**{name: get_int(request, name)})
+    queryset = queryset[:limit]
+    return queryset, fields, limit, next_url_builder(request)
+
+
+@api_view
+def resource_list(request, resource):
+    return StreamingHttpResponse(
+        stream_rows(*list_query(request, resource)),
+        content_type="application/json",
+    )
+
+
+@api_view
+def resource_detail(request, resource, pk):
+    model = RESOURCES[resource][0]
+    fields = get_fields(request, resource)
+    try:
+        row = model.objects.values(*fields).get(pk=pk)
+    except model.DoesNotExist:
+        return json_response({"error": "Not found."}, status=404)
+    return json_response(row)
+
+
+# Native async views for the high-traffic reads. Serve them through
+# custom_models.asgi; under WSGI Django has to buffer async streams.
+
+
+@async_api_view
+async def enrollment_list(request):
+    return StreamingHttpResponse(
+        astream_rows(*list_query(request, "enrollments")),
+        content_type="application/json",
+    )
+
+
+@async_api_view
+async def course_detail(request, pk):
+    """A course with its teacher and (cached) enrollment count."""
+    fields = get_fields(request, "courses")
+    try:
+        course, teacher, enrollment_count = await asyncio.gather(
+            Course.objects.values(*fields).aget(pk=pk),
+            Teacher.objects.filter(courses=pk)
+            .values("id", "first_name", "last_name")
+            .afirst(),
+            sync_to_async(rosters.course_enrollment_count)(pk),
+        )
+    except Course.DoesNotExist:
+        return json_response({"error": "Not found."}, status=404)
+    course["teacher"] = teacher
+    course["enrollment_count"] = enrollment_count
+    return json_response(course)
+
+
+@async_api_view
+async def course_roster(request, pk):
+    """Stream the students enrolled in a course, in enrollment order.
+
+    The first page of a roster small enough to cache comes from
+    myapp.rosters.
+    """
+    if not await Course.objects.filter(pk=pk).aexists():
+        return json_response({"error": "Not found."}, status=404)
+    limit = get_int(request, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    after = get_int(request, "after")
+    if after is None:
+        roster = await sync_to_async(rosters.course_roster)(pk)
+        if roster is not None:
+            page = roster[:limit]
+            next_url = None
+            if page and len(roster) > limit:
+                next_url = next_url_builder(request)(page[-1]["id"])
+            return json_response({"results": page, "next": next_url})
+    queryset = Enrollment.objects.filter(course_id=pk).order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    queryset = queryset.annotate(
+        first_name=F("student__first_name"),
+        last_name=F("student__last_name"),
+        email=F("student__email"),
+    )[:limit]
+    fields = [
+        "id",
+        "student_id",
+        "first_name",
+        "last_name",
+        "email",
+        "enrollment_date",
+    ]
+
+    return StreamingHttpResponse(
+        astream_rows(queryset, fields, limit, next_url_builder(request)),
+        content_type="application/json",
+    )
+
+
+@require_GET
+def cache_stats(request):
+    """Hit and miss counts of the roster cache in this process."""
+    if not (request.user.is_active and request.user.is_staff):
+        return json_response({"error": "Staff access required."}, status=403)
+    return json_response(dict(rosters.stats))
+
+
+@require_GET
+def change_feed(request):
+    """Changes after ``?after=``, with each changed row's current values.
+
+    ``?model=`` (comma-separated) restricts the feed to some tables and
+    ``?rows=0`` leaves out the values. Store ``cursor`` and pass it as
+    ``after`` next time; ``next`` is null once the feed is caught up.
+    """
+    if not (request.user.is_active and request.user.is_staff):
+        return json_response({"error": "Staff access required."}, status=403)
+    try:
+        after = get_int(request, "after", 0)
+        limit = get_int(request, "limit", changes.BATCH_SIZE, changes.MAX_BATCH_SIZE)
+    except BadRequest as e:
+        return json_response({"error": str(e)}, status=400)
+    models = [name for name in request.GET.get("model", "").split(",") if name]
+    unknown = set(models) - set(changes.TRACKED)
+    if unknown:
+        return json_response(
+            {"error": f"Unknown models: {', '.join(sorted(unknown))}."}, status=400
+        )
+
+    batch = changes.changes_since(after, models, limit)
+    cursor = batch[-1].pk if batch else after
+    more = bool(batch) and len(batch) == limit
+    return json_response(
+        {
+            "results": changes.serialize(batch, rows=request.GET.get("rows") != "0"),
+            "cursor": cursor,
+            "next": next_url_builder(request)(cursor) if more else None,
+        }
+    )
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def perf_report(request):
+    """Profiling records from this process, per view/command and recent."""
+    if request.method == "POST":
+        profiling.clear()
+        return HttpResponseRedirect(request.path)
+    rows = profiling.records()
+    if request.GET.get("format") == "json":
+        response = json_response(
+            {"summary": profiling.summarize(rows), "records": rows}
+        )
+        response["Content-Disposition"] = 'attachment; filename="perf.json"'
+        return response
+    context = {
+        **admin.site.each_context(request),
+        "title": "Performance",
+        "sample_rate": profiling.sample_rate(),
+        "summary": profiling.summarize(rows),
+        "records": rows[::-1],
+    }
+    return TemplateResponse(request, "admin/perf.html", context)